@@ -0,0 +1,49 @@
+# backend/accounts/authentication.py
+from django.http import JsonResponse
+from django.views import View
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+async def aauthenticate(request):
+    """
+    Async twin of ``JWTAuthentication.authenticate``.
+    Token validation is pure CPU; the user is loaded with ``afirst()`` so no
+    thread hop is needed. Returns the user or ``None``.
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    if header is None:
+        return None
+    raw_token = auth.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = auth.get_validated_token(raw_token)
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+    return await User.objects.filter(
+        **{api_settings.USER_ID_FIELD: user_id}, is_active=True
+    ).afirst()
+
+
+class AsyncJWTView(View):
+    """
+    Base class for native async views that require a JWT, mirroring
+    DRF's ``IsAuthenticated`` responses.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await aauthenticate(request)
+        except InvalidToken as exc:
+            return JsonResponse(exc.detail, status=401)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
@@ -15,3 +15,7 @@ class AdminOrReadOnly(BasePermission):
         if request.method in SAFE_METHODS:
             return request.user.is_authenticated
         return request.user.is_authenticated and role == "admin"
+
+class IsOpsOrAdmin(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and getattr(request.user, "role", None) in ("admin", "ops")
@@ -1,9 +1,23 @@
 from django.contrib import admin
 
-from .models import Product
+from .models import Product, ProductRanking, StockReservation
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ("name", "slug", "price", "currency", "stock_qty", "updated_at")
     search_fields = ("name", "slug")
+
+
+@admin.register(ProductRanking)
+class ProductRankingAdmin(admin.ModelAdmin):
+    list_display = ("kind", "window_days", "computed_at")
+    list_filter = ("kind",)
+    readonly_fields = ("kind", "window_days", "results", "computed_at")
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("order", "product", "qty", "status", "expires_at")
+    list_filter = ("status",)
+    raw_id_fields = ("order", "product")
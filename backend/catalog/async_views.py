@@ -0,0 +1,28 @@
+"""Native async variant of ``ProductDetailView`` for the ASGI deployment."""
+from django.http import Http404, JsonResponse
+from django.utils.decorators import method_decorator
+
+from accounts.authentication import AsyncJWTView
+from exbuy_core.db_router import read_from_replica
+from exbuy_core.ratelimit import ais_ratelimited
+from ops import counters
+from .cache import aget_product_detail, entry_response
+
+
+@method_decorator(read_from_replica, name="get")
+class AsyncProductDetailView(AsyncJWTView):
+    async def get(self, request, slug):
+        if await ais_ratelimited(request, "product_detail", 60):
+            return JsonResponse({"detail": "Request was throttled."}, status=429)
+
+        try:
+            entry, source = await aget_product_detail(slug)
+        except Http404:
+            return JsonResponse({"detail": "No Product matches the given query."}, status=404)
+        response = entry_response(request, entry, source)
+        if response.status_code == 304:
+            return response
+
+        await counters.acount_views([slug], request)
+
+        return response
@@ -0,0 +1,305 @@
+"""Cached product detail payloads.
+
+Entries are fresh for ``FRESH_SECONDS`` and kept for ``STALE_SECONDS``
+longer. Once an entry is stale, one request (holding a short lock taken with
+``cache.add``) rebuilds it while concurrent requests keep getting the stale
+copy, so an expiring hot product costs one query instead of one per request.
+On a cold miss the requests that lose the lock wait briefly for the winner's
+entry instead of all querying at once.
+
+Saving or deleting a ``Product`` bumps its version once the transaction
+commits (see ``catalog.signals``); entries from an older version are never
+served, so edits are visible immediately. Entries are always built from the
+primary, never a replica, so a new version cannot carry an old row. Saves also rebuild the entry right
+away so the next requests do not all miss.
+
+Fresh entries are also kept in an in-process tier (``local_details``) so hot
+products are served without touching Redis; invalidations reach every
+process through Redis pub/sub (see ``exbuy_core.local_cache``).
+
+Entries hold the final response: the rendered JSON body, gzip (and, when
+the optional ``brotli`` package is installed, brotli) variants of it, and the
+``ETag``/``Last-Modified`` header values, so a hit is answered by
+:func:`entry_response` without serializing or formatting anything.
+
+Lookups return ``(entry, source)`` where ``source`` is ``"local"``,
+``"redis"`` or ``"miss"`` (rebuilt from the database).
+"""
+import asyncio
+import gzip
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.timezone import is_naive, make_aware
+from rest_framework.renderers import JSONRenderer
+
+from exbuy_core.local_cache import LocalCache, invalidate
+from .models import Product
+from .serializers import ProductSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FRESH_SECONDS = 300
+STALE_SECONDS = 3600
+LOCK_SECONDS = 10
+# How long requests that lost the lock on a cold miss wait for the entry.
+MISS_WAIT_SECONDS = 1.0
+MISS_POLL_SECONDS = 0.05
+VERSION_TIMEOUT = 60 * 60 * 24
+# Entries cached in an older layout are treated as misses.
+ENTRY_FORMAT = 2
+# Bodies smaller than this are not worth a compressed variant.
+MIN_COMPRESS_BYTES = 256
+
+_ACCEPTS = {"br": re.compile(r"\bbr\b"), "gzip": re.compile(r"\bgzip\b")}
+
+local_details = LocalCache(
+    "catalog.product_detail",
+    max_entries=settings.CATALOG_LOCAL_CACHE_SIZE,
+    timeout=settings.CATALOG_LOCAL_CACHE_TIMEOUT,
+)
+
+
+def detail_cache_key(slug):
+    return f"product:detail:{slug}"
+
+
+def _version_key(slug):
+    return f"product:detail:{slug}:version"
+
+
+def _lock_key(slug):
+    return f"product:detail:{slug}:lock"
+
+
+def build_entry(product, version):
+    last_modified = product.updated_at
+    if is_naive(last_modified):
+        last_modified = make_aware(last_modified)
+    etag_payload = f"{product.id}:{product.updated_at.timestamp()}"
+    body = JSONRenderer().render(ProductSerializer(product).data)
+    entry = {
+        "format": ENTRY_FORMAT,
+        "body": body,
+        "etag": f'W/"{hashlib.sha256(etag_payload.encode("utf-8")).hexdigest()}"',
+        "last_modified": http_date(last_modified.timestamp()),
+        "version": version,
+        "fresh_until": time.time() + FRESH_SECONDS,
+    }
+    if len(body) >= MIN_COMPRESS_BYTES:
+        entry["gzip"] = gzip.compress(body, mtime=0)
+        if brotli is not None:
+            entry["br"] = brotli.compress(body)
+    return entry
+
+
+def entry_response(request, entry, source):
+    """The response for a cached entry: ``304`` or its stored body, compressed if accepted."""
+    if request.headers.get("If-None-Match") == entry["etag"]:
+        return HttpResponseNotModified()
+    if request.headers.get("If-Modified-Since") == entry["last_modified"]:
+        return HttpResponseNotModified()
+
+    accept_encoding = request.headers.get("Accept-Encoding", "")
+    for encoding in ("br", "gzip"):
+        if encoding in entry and _ACCEPTS[encoding].search(accept_encoding):
+            response = HttpResponse(entry[encoding], content_type="application/json")
+            response["Content-Encoding"] = encoding
+            break
+    else:
+        response = HttpResponse(entry["body"], content_type="application/json")
+    patch_vary_headers(response, ("Accept-Encoding",))
+    response["ETag"] = entry["etag"]
+    response["Last-Modified"] = entry["last_modified"]
+    response["X-Cache"] = source
+    return response
+
+
+def _current(values, slug):
+    """Return ``(entry or None, version)``; entries of older versions or formats are dropped."""
+    version = values.get(_version_key(slug), 0)
+    entry = values.get(detail_cache_key(slug))
+    if entry is not None and (entry.get("format") != ENTRY_FORMAT or entry["version"] != version):
+        entry = None
+    return entry, version
+
+
+def _is_fresh(entry):
+    return entry["fresh_until"] > time.time()
+
+
+def _remember(slug, entry):
+    # Never keep an entry locally past its freshness.
+    local_details.set(slug, entry, min(local_details.timeout, entry["fresh_until"] - time.time()))
+    return entry
+
+
+def _local(slug):
+    entry = local_details.get(slug)
+    if entry is not None and _is_fresh(entry):
+        return entry
+    return None
+
+
+def _products():
+    # Entries are filled from the primary even under ``read_from_replica``: a
+    # lagging replica's row would be stored under the new version as current.
+    return Product.objects.using(DEFAULT_DB_ALIAS)
+
+
+def _rebuild(slug, version):
+    try:
+        product = _products().get(slug=slug)
+    except Product.DoesNotExist:
+        raise Http404("No Product matches the given query.")
+    entry = build_entry(product, version)
+    cache.set(detail_cache_key(slug), entry, FRESH_SECONDS + STALE_SECONDS)
+    return _remember(slug, entry)
+
+
+def get_product_detail(slug):
+    """Return ``(entry, source)`` for ``slug``; raises ``Http404`` for unknown slugs."""
+    entry = _local(slug)
+    if entry is not None:
+        return entry, "local"
+
+    keys = [detail_cache_key(slug), _version_key(slug)]
+    entry, version = _current(cache.get_many(keys), slug)
+    if entry is not None and _is_fresh(entry):
+        return _remember(slug, entry), "redis"
+
+    if not cache.add(_lock_key(slug), 1, LOCK_SECONDS):
+        if entry is not None:
+            return entry, "redis"  # someone else is revalidating: serve stale
+        deadline = time.monotonic() + MISS_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(MISS_POLL_SECONDS)
+            entry, version = _current(cache.get_many(keys), slug)
+            if entry is not None:
+                return entry, "redis"
+        return _rebuild(slug, version), "miss"
+
+    try:
+        return _rebuild(slug, version), "miss"
+    finally:
+        cache.delete(_lock_key(slug))
+
+
+async def _arebuild(slug, version):
+    try:
+        product = await _products().aget(slug=slug)
+    except Product.DoesNotExist:
+        raise Http404("No Product matches the given query.")
+    entry = build_entry(product, version)
+    await cache.aset(detail_cache_key(slug), entry, FRESH_SECONDS + STALE_SECONDS)
+    return _remember(slug, entry)
+
+
+async def aget_product_detail(slug):
+    """Async :func:`get_product_detail`."""
+    entry = _local(slug)
+    if entry is not None:
+        return entry, "local"
+
+    keys = [detail_cache_key(slug), _version_key(slug)]
+    entry, version = _current(await cache.aget_many(keys), slug)
+    if entry is not None and _is_fresh(entry):
+        return _remember(slug, entry), "redis"
+
+    if not await cache.aadd(_lock_key(slug), 1, LOCK_SECONDS):
+        if entry is not None:
+            return entry, "redis"
+        deadline = time.monotonic() + MISS_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(MISS_POLL_SECONDS)
+            entry, version = _current(await cache.aget_many(keys), slug)
+            if entry is not None:
+                return entry, "redis"
+        return await _arebuild(slug, version), "miss"
+
+    try:
+        return await _arebuild(slug, version), "miss"
+    finally:
+        await cache.adelete(_lock_key(slug))
+
+
+def get_product_details(slugs):
+    """Return ``{slug: entry}`` for the known ``slugs``, in three round trips at most.
+
+    Local hits first, then one ``get_many`` for the rest, then a single
+    ``slug__in`` query for missing or stale entries, which are written back
+    with one ``set_many``. Unknown slugs are left out.
+    """
+    found, remaining = {}, []
+    for slug in dict.fromkeys(slugs):
+        entry = _local(slug)
+        if entry is not None:
+            found[slug] = entry
+        else:
+            remaining.append(slug)
+    if not remaining:
+        return found
+
+    keys = [key for slug in remaining for key in (detail_cache_key(slug), _version_key(slug))]
+    values = cache.get_many(keys)
+    versions, misses = {}, []
+    for slug in remaining:
+        entry, versions[slug] = _current(values, slug)
+        if entry is not None and _is_fresh(entry):
+            found[slug] = _remember(slug, entry)
+        else:
+            misses.append(slug)
+    if not misses:
+        return found
+
+    rebuilt = {}
+    for product in _products().filter(slug__in=misses):
+        rebuilt[product.slug] = _remember(product.slug, build_entry(product, versions[product.slug]))
+    if rebuilt:
+        cache.set_many(
+            {detail_cache_key(slug): entry for slug, entry in rebuilt.items()},
+            FRESH_SECONDS + STALE_SECONDS,
+        )
+    found.update(rebuilt)
+    return found
+
+
+def _bump(slug):
+    key = _version_key(slug)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        version = 1
+        if not cache.add(key, version, VERSION_TIMEOUT):
+            version = cache.incr(key)
+    else:
+        cache.touch(key, VERSION_TIMEOUT)
+    return version
+
+
+def invalidate_product(slug, rebuild=False, using=None):
+    """Invalidate ``slug`` after commit, optionally rebuilding it right away."""
+    def run():
+        version = _bump(slug)
+        # Other processes drop their local copy; the next request there reads
+        # the rebuilt entry from Redis.
+        invalidate(local_details, slug)
+        if rebuild:
+            try:
+                _rebuild(slug, version)
+                return
+            except Http404:
+                pass
+        cache.delete(detail_cache_key(slug))
+
+    transaction.on_commit(run, using=using)
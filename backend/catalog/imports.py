@@ -0,0 +1,222 @@
+"""Streaming product imports (CSV and NDJSON).
+
+Rows are read one at a time and upserted by ``slug`` in chunks of
+``chunk_size`` with ``bulk_create(update_conflicts=True)``, one transaction
+per chunk. Each product stores a hash of its imported fields; rows whose hash
+matches the stored one are skipped, so re-importing a mostly unchanged
+catalog only writes what changed. ``bulk_create`` sends no signals, so the
+cached details of the written products are invalidated after every chunk.
+
+``stock_qty`` in the feed is the stock on hand. Held reservations (see
+``catalog.inventory``) have already been taken from the stored value and are
+given back when released, so they are subtracted before it is written.
+
+Only the current chunk is held in memory, whatever the size of the file.
+:func:`import_products` yields an :class:`ImportProgress` after every chunk
+so callers can report throughput while the import runs.
+"""
+import codecs
+import csv
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator, validate_slug
+from django.db import transaction
+from django.db.models import Sum
+
+from .cache import invalidate_product
+from .models import Product, StockReservation
+
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+FIELDS = ("slug", "name", "description", "price", "currency", "image_url", "stock_qty")
+UPDATE_FIELDS = [*FIELDS[1:], "content_hash", "updated_at"]
+
+_validate_url = URLValidator()
+
+
+class InvalidRow(ValueError):
+    pass
+
+
+@dataclass
+class ImportProgress:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "elapsed": round(self.elapsed, 2),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def decode_lines(chunks, encoding="utf-8"):
+    """Decode an iterable of byte lines (e.g. a request) into text lines."""
+    return codecs.iterdecode(chunks, encoding)
+
+
+def read_rows(lines, import_format):
+    """Yield ``(line_number, dict)`` from text ``lines``; bad JSON lines yield an ``InvalidRow``."""
+    if import_format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, InvalidRow(f"Invalid JSON: {exc}")
+            continue
+        yield number, row if isinstance(row, dict) else InvalidRow("Expected a JSON object.")
+
+
+def _text(row, name, max_length, required=False, default=""):
+    value = row.get(name)
+    value = default if value in (None, "") else str(value).strip()
+    if required and not value:
+        raise InvalidRow(f"{name} is required.")
+    if max_length is not None and len(value) > max_length:
+        raise InvalidRow(f"{name} is longer than {max_length} characters.")
+    return value
+
+
+def clean_row(row):
+    """Validate an import row into ``Product`` field values; raises :class:`InvalidRow`."""
+    slug = _text(row, "slug", 50, required=True)
+    try:
+        validate_slug(slug)
+    except ValidationError:
+        raise InvalidRow(f"Invalid slug {slug!r}.")
+    image_url = _text(row, "image_url", 200)
+    if image_url:
+        try:
+            _validate_url(image_url)
+        except ValidationError:
+            raise InvalidRow(f"Invalid image_url {image_url!r}.")
+    try:
+        price = Decimal(str(row.get("price", "")).strip())
+    except InvalidOperation:
+        raise InvalidRow("price must be a number.")
+    if not price.is_finite():
+        raise InvalidRow("price must be a number.")
+    price = price.quantize(Decimal("0.01"))
+    if price < 0 or price.adjusted() >= 10:  # max_digits=12, decimal_places=2
+        raise InvalidRow("price is out of range.")
+    try:
+        stock_qty = int(row.get("stock_qty") or 0)
+    except (TypeError, ValueError):
+        raise InvalidRow("stock_qty must be an integer.")
+    if stock_qty < 0:
+        raise InvalidRow("stock_qty must not be negative.")
+    return {
+        "slug": slug,
+        "name": _text(row, "name", 200, required=True),
+        "description": _text(row, "description", None),
+        "price": price,
+        "currency": _text(row, "currency", 8, default="BDT"),
+        "image_url": image_url,
+        "stock_qty": stock_qty,
+    }
+
+
+def content_hash(values):
+    payload = json.dumps([str(values[name]) for name in FIELDS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _subtract_held(products):
+    """Turn the imported on-hand ``stock_qty`` into what is left after held reservations."""
+    slugs = [product.slug for product in products]
+    # Reservations change stock_qty under the row lock; taking it first means
+    # every held quantity read below is already in the row being replaced.
+    list(Product.objects.select_for_update().filter(slug__in=slugs).values_list("id", flat=True))
+    held = dict(
+        StockReservation.objects.filter(status=StockReservation.Status.HELD, product__slug__in=slugs)
+        .values("product__slug")
+        .annotate(qty=Sum("qty"))
+        .values_list("product__slug", "qty")
+    )
+    for product in products:
+        product.stock_qty = max(0, product.stock_qty - held.get(product.slug, 0))
+
+
+def _upsert(chunk, progress):
+    # A slug repeated within a chunk cannot be upserted twice in one statement.
+    rows = {values["slug"]: values for values in chunk}
+    stored = dict(Product.objects.filter(slug__in=rows).values_list("slug", "content_hash"))
+    changed = []
+    for slug, values in rows.items():
+        digest = content_hash(values)
+        if stored.get(slug) == digest:
+            progress.unchanged += 1
+            continue
+        if slug in stored:
+            progress.updated += 1
+        else:
+            progress.created += 1
+        changed.append(Product(**values, content_hash=digest))
+    progress.unchanged += len(chunk) - len(rows)
+    if not changed:
+        return
+    with transaction.atomic():
+        _subtract_held(changed)
+        Product.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["slug"],
+            update_fields=UPDATE_FIELDS,
+        )
+        for product in changed:
+            invalidate_product(product.slug)
+
+
+def import_products(lines, import_format, chunk_size=CHUNK_SIZE):
+    """Import products from text ``lines``, yielding the progress after every chunk."""
+    progress = ImportProgress()
+    chunk = []
+    for number, row in read_rows(lines, import_format):
+        progress.rows += 1
+        try:
+            if isinstance(row, InvalidRow):
+                raise row
+            chunk.append(clean_row(row))
+        except InvalidRow as exc:
+            progress.invalid += 1
+            if len(progress.errors) < MAX_REPORTED_ERRORS:
+                progress.errors.append({"line": number, "error": str(exc)})
+        if len(chunk) >= chunk_size:
+            _upsert(chunk, progress)
+            chunk = []
+            yield progress
+    if chunk:
+        _upsert(chunk, progress)
+    yield progress
@@ -0,0 +1,212 @@
+"""Stock reservations for order items.
+
+:func:`reserve_order` takes the stock of every catalog product in an order
+(``OrderItem.product_no`` is the product slug; other items are not stock
+tracked) inside the caller's transaction, one conditional UPDATE per product
+(``SET stock_qty = stock_qty - n WHERE stock_qty >= n``) in product id order
+so concurrent orders lock rows in the same order. If any product is short
+nothing is taken and :class:`OutOfStock` is raised.
+
+Reservations are ``held`` for ``STOCK_RESERVATION_SECONDS``. Paying the order
+(``purchased``) commits them; cancelling it gives the stock back, and
+``release_stock_reservations`` cancels unpaid orders whose reservations
+expired.
+
+Products listed in ``STOCK_HOT_SKUS`` are also counted in Redis. The counter
+is checked and decremented atomically before the database is touched, so
+once a hot product sells out further orders are turned away without queueing
+on its row lock. The row stays the source of truth: the counter is seeded
+from it, expires after ``STOCK_GATE_SECONDS`` and is re-seeded, and a passed
+gate is still followed by the conditional UPDATE.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from exbuy_core.redis import get_redis
+from .cache import invalidate_product
+from .models import Product, StockReservation
+
+Status = StockReservation.Status
+
+# Returns the remaining stock, -1 if the counter is not seeded, -2 if short.
+_TAKE_SCRIPT = """
+local stock = redis.call('GET', KEYS[1])
+if not stock then return -1 end
+stock = tonumber(stock)
+local qty = tonumber(ARGV[1])
+if stock < qty then return -2 end
+return redis.call('DECRBY', KEYS[1], qty)
+"""
+
+# INCRBY on a missing key would create it from zero; leave it to be re-seeded.
+_GIVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return redis.call('INCRBY', KEYS[1], ARGV[1]) end
+return nil
+"""
+
+
+class OutOfStock(ValueError):
+    def __init__(self, slugs):
+        self.slugs = sorted(slugs)
+        super().__init__(f"Not enough stock for: {', '.join(self.slugs)}.")
+
+
+def gate_key(product_id):
+    return f"stock:gate:{product_id}"
+
+
+def _gated(products):
+    hot = set(settings.STOCK_HOT_SKUS)
+    if not hot or get_redis() is None:
+        return []
+    return [product for product in products if product.slug in hot]
+
+
+def _gate_take(product, qty):
+    client = get_redis()
+    take = client.register_script(_TAKE_SCRIPT)
+    remaining = take(keys=[gate_key(product.pk)], args=[qty])
+    if remaining == -1:
+        stock = Product.objects.filter(pk=product.pk).values_list("stock_qty", flat=True).first() or 0
+        client.set(gate_key(product.pk), stock, ex=settings.STOCK_GATE_SECONDS, nx=True)
+        remaining = take(keys=[gate_key(product.pk)], args=[qty])
+    return remaining >= 0
+
+
+def _gate_give(quantities):
+    """Return ``{product_id: qty}`` to the hot products' counters."""
+    client = get_redis()
+    if client is None or not quantities:
+        return
+    pipe = client.pipeline()
+    for product_id, qty in quantities.items():
+        pipe.eval(_GIVE_SCRIPT, 1, gate_key(product_id), qty)
+    pipe.execute()
+
+
+def _restock(quantities):
+    now = timezone.now()
+    for product_id in sorted(quantities):
+        Product.objects.filter(pk=product_id).update(
+            stock_qty=F("stock_qty") + quantities[product_id], updated_at=now
+        )
+
+
+def _invalidate(product_ids):
+    for slug in Product.objects.filter(pk__in=product_ids).values_list("slug", flat=True):
+        invalidate_product(slug)
+
+
+def reserve_order(order, items):
+    """Reserve stock for ``items`` (dicts or ``OrderItem``s) of ``order``.
+
+    Must run inside the transaction that creates the order. Returns the
+    reservations; raises :class:`OutOfStock` naming the short products.
+    """
+    wanted = Counter()
+    for item in items:
+        product_no = item.get("product_no") if isinstance(item, dict) else item.product_no
+        qty = item["qty"] if isinstance(item, dict) else item.qty
+        if product_no:
+            wanted[product_no] += qty
+    products = sorted(Product.objects.filter(slug__in=wanted).only("id", "slug"), key=lambda product: product.pk)
+    if not products:
+        return []
+    quantities = {product.pk: wanted[product.slug] for product in products}
+
+    now = timezone.now()
+    taken = {}
+    try:
+        for product in _gated(products):
+            if not _gate_take(product, quantities[product.pk]):
+                raise OutOfStock([product.slug])
+            taken[product.pk] = quantities[product.pk]
+
+        short = [
+            product.slug
+            for product in products
+            if not Product.objects.filter(pk=product.pk, stock_qty__gte=quantities[product.pk]).update(
+                stock_qty=F("stock_qty") - quantities[product.pk], updated_at=now
+            )
+        ]
+        if short:
+            raise OutOfStock(short)
+    except OutOfStock:
+        _gate_give(taken)
+        raise
+
+    # Orders created already paid keep their stock right away.
+    status = Status.HELD if order.order_status == order.OrderStatus.TO_PAY else Status.COMMITTED
+    expires_at = now + timedelta(seconds=settings.STOCK_RESERVATION_SECONDS)
+    reservations = StockReservation.objects.bulk_create(
+        [
+            StockReservation(order=order, product_id=product_id, qty=qty, status=status, expires_at=expires_at)
+            for product_id, qty in quantities.items()
+        ]
+    )
+    _invalidate(quantities)
+    return reservations
+
+
+def _settle(reservations, status):
+    """Move the unreleased ``reservations`` to ``status``; returns how many moved."""
+    with transaction.atomic():
+        rows = list(
+            reservations.exclude(status=Status.RELEASED)
+            .select_for_update()
+            .values_list("id", "product_id", "qty")
+        )
+        if not rows:
+            return 0
+        StockReservation.objects.filter(id__in=[pk for pk, _product_id, _qty in rows]).update(
+            status=status, updated_at=timezone.now()
+        )
+        if status == Status.RELEASED:
+            quantities = Counter()
+            for _pk, product_id, qty in rows:
+                quantities[product_id] += qty
+            _restock(quantities)
+            transaction.on_commit(lambda: _gate_give(quantities))
+            _invalidate(quantities)
+        return len(rows)
+
+
+def commit_orders(order_pks):
+    """Keep the stock of paid orders: their held reservations no longer expire."""
+    return _settle(StockReservation.objects.filter(order_id__in=order_pks, status=Status.HELD), Status.COMMITTED)
+
+
+def release_orders(order_pks):
+    """Give back the stock of cancelled orders."""
+    return _settle(StockReservation.objects.filter(order_id__in=order_pks), Status.RELEASED)
+
+
+def release_expired(now=None, batch_size=500):
+    """Cancel unpaid orders whose reservations expired and give their stock back.
+
+    Expired reservations of orders that are not awaiting payment are released
+    without touching the order. Returns the number of orders handled.
+    """
+    from orders.models import Order  # orders.transitions imports this module
+    from orders.transitions import bulk_transition
+
+    now = now or timezone.now()
+    handled = 0
+    while True:
+        expired = StockReservation.objects.filter(status=Status.HELD, expires_at__lte=now)
+        order_pks = list(expired.order_by("order_id").values_list("order_id", flat=True).distinct()[:batch_size])
+        if not order_pks:
+            return handled
+        bulk_transition(
+            Order.objects.filter(pk__in=order_pks, order_status=Order.OrderStatus.TO_PAY),
+            Order.OrderStatus.CANCELLED,
+            note="Stock reservation expired",
+        )
+        # Orders that were paid meanwhile committed theirs; this only catches the rest.
+        _settle(expired.filter(order_id__in=order_pks), Status.RELEASED)
+        handled += len(order_pks)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from catalog.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = "Fold new sales and product views into the daily stats and recompute the product rankings."
+
+    def handle(self, *args, **options):
+        if not refresh_rankings():
+            self.stdout.write(self.style.WARNING("Rankings are already being computed; skipped."))
+            return
+        self.stdout.write(self.style.SUCCESS("Product rankings updated."))
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.imports import CHUNK_SIZE, FORMATS, import_products
+
+
+class Command(BaseCommand):
+    help = "Upsert products by slug from a CSV or NDJSON file, streaming it in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        import_format = options["format"] or path.suffix.lstrip(".").lower()
+        if import_format not in FORMATS:
+            raise CommandError(f"Unknown format {import_format!r}; pass --format csv or --format ndjson.")
+
+        progress = None
+        with path.open(encoding="utf-8", newline="") as lines:
+            for progress in import_products(lines, import_format, chunk_size=options["chunk_size"]):
+                self.stdout.write(
+                    f"{progress.rows} rows ({progress.rows_per_second:.0f}/s): {progress.created} created, "
+                    f"{progress.updated} updated, {progress.unchanged} unchanged, {progress.invalid} invalid"
+                )
+
+        for error in progress.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {progress.rows} rows in {progress.elapsed:.1f}s."))
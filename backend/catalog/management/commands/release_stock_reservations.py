@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from catalog.inventory import release_expired
+
+
+class Command(BaseCommand):
+    help = "Cancel unpaid orders whose stock reservations expired and give the stock back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        handled = release_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Released the reservations of {handled} orders."))
@@ -9,8 +9,84 @@ class Product(models.Model):
     currency = models.CharField(max_length=8, default="BDT")
     image_url = models.URLField(blank=True)
     stock_qty = models.PositiveIntegerField(default=0)
+    # Hash of the imported fields; unchanged rows are skipped on re-import.
+    content_hash = models.CharField(max_length=64, blank=True, default="", editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self) -> str:
         return self.name
+
+
+class ProductDailyStat(models.Model):
+    """Units sold and detail views of a product on one day (see ``rankings``)."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="daily_stats")
+    day = models.DateField()
+    units_sold = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "day"], name="product_daily_stat_unique"),
+        ]
+        indexes = [models.Index(fields=["day"], name="product_daily_stat_day_idx")]
+
+
+class RankingWatermark(models.Model):
+    """Highest source row id already folded into ``ProductDailyStat``."""
+
+    source = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.source} @ {self.last_id}"
+
+
+class ProductRanking(models.Model):
+    """A computed top-N product list, kept as a snapshot."""
+
+    class Kind(models.TextChoices):
+        POPULAR = "popular", "Popular"
+        ANALYST_CHOICE = "analyst_choice", "Analyst's choice"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    window_days = models.PositiveIntegerField()
+    results = models.JSONField(default=list)
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["kind", "-computed_at"], name="product_ranking_latest_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.kind} @ {self.computed_at:%Y-%m-%d %H:%M}"
+
+
+class StockReservation(models.Model):
+    """Stock taken from a product for an order item (see ``inventory``).
+
+    ``held`` reservations expire unless the order is paid (``committed``);
+    expired or cancelled ones give their quantity back (``released``).
+    """
+
+    class Status(models.TextChoices):
+        HELD = "held", "Held"
+        COMMITTED = "committed", "Committed"
+        RELEASED = "released", "Released"
+
+    order = models.ForeignKey("orders.Order", on_delete=models.CASCADE, related_name="stock_reservations")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reservations")
+    qty = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "expires_at"], name="stock_reservation_expiry_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.qty} x {self.product_id} for order {self.order_id} ({self.status})"
@@ -0,0 +1,210 @@
+"""Popular / analyst's-choice product rankings.
+
+``refresh_rankings`` (run periodically by ``compute_product_rankings``):
+
+1. Folds only the new source rows into ``ProductDailyStat``: order items
+   (units sold; ``OrderItem.product_no`` is the product slug) and view
+   rollups (views, see ``ops.counters``). A ``RankingWatermark`` per source
+   records the last row id processed, advanced in the same transaction as
+   the counts it produced. Rows newer than ``PRODUCT_RANKING_SETTLE_SECONDS``
+   wait for the next run (see :func:`_fold`). Items of orders already cancelled are skipped;
+   an order cancelled after it was counted keeps counting until its day
+   leaves the window.
+2. Ranks products over the last ``PRODUCT_RANKING_WINDOW_DAYS`` days of
+   daily stats (older days are pruned) and stores the top
+   ``PRODUCT_RANKING_SIZE`` in a ``ProductRanking`` snapshot and the cache.
+
+*Popular* ranks by units sold, then views. *Analyst's choice* ranks by
+units sold per view among products with at least
+``PRODUCT_RANKING_MIN_VIEWS`` views: the ones that convert best.
+
+The ranking endpoints only read the cached result (see
+:func:`get_ranking`).
+"""
+import hashlib
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ops.models import ViewRollup
+from orders.models import Order, OrderItem
+from .models import Product, ProductDailyStat, ProductRanking, RankingWatermark
+
+Kind = ProductRanking.Kind
+
+CHUNK_SIZE = 5000
+LOCK_KEY = "product:ranking:lock"
+LOCK_SECONDS = 600
+SNAPSHOTS_KEPT = 50
+
+
+def ranking_cache_key(kind):
+    return f"product:ranking:{kind}"
+
+
+def _add_stats(counts, field):
+    """Add ``{(product_id, day): n}`` to ``field`` of the daily stats."""
+    if not counts:
+        return
+    product_ids = {product_id for product_id, _day in counts}
+    days = {day for _product_id, day in counts}
+    existing = {
+        (stat.product_id, stat.day): stat
+        for stat in ProductDailyStat.objects.select_for_update().filter(
+            product_id__in=product_ids, day__in=days
+        )
+    }
+    created, updated = [], []
+    for (product_id, day), amount in counts.items():
+        stat = existing.get((product_id, day))
+        if stat is None:
+            created.append(ProductDailyStat(product_id=product_id, day=day, **{field: amount}))
+        else:
+            setattr(stat, field, getattr(stat, field) + amount)
+            updated.append(stat)
+    ProductDailyStat.objects.bulk_create(created)
+    ProductDailyStat.objects.bulk_update(updated, [field])
+
+
+def _fold(source, model, collect, inserted_at):
+    """Fold rows of ``model`` after the watermark, chunk by chunk.
+
+    ``collect(low, high)`` returns the counts for ids in ``(low, high]``.
+
+    Ids are taken when a row is inserted, not when its transaction commits,
+    so a row still in flight can get a lower id than one already visible.
+    The watermark therefore only advances to the newest row inserted (per
+    the ``inserted_at`` lookup) at least ``PRODUCT_RANKING_SETTLE_SECONDS``
+    ago; every lower id has committed or rolled back by then.
+    """
+    watermark, _created = RankingWatermark.objects.get_or_create(source=source)
+    settled = timezone.now() - timedelta(seconds=settings.PRODUCT_RANKING_SETTLE_SECONDS)
+    newer = model.objects.filter(id__gt=watermark.last_id, **{f"{inserted_at}__lt": settled})
+    high_water = newer.aggregate(Max("id"))["id__max"] or 0
+    while watermark.last_id < high_water:
+        upper = min(watermark.last_id + CHUNK_SIZE, high_water)
+        with transaction.atomic():
+            field, counts = collect(watermark.last_id, upper)
+            _add_stats(counts, field)
+            watermark.last_id = upper
+            watermark.save(update_fields=["last_id", "updated_at"])
+
+
+def _collect_sales(low, high):
+    rows = (
+        OrderItem.objects.filter(id__gt=low, id__lte=high)
+        .exclude(product_no="")
+        .exclude(order__order_status=Order.OrderStatus.CANCELLED)
+        .values("product_no", day=TruncDate("order__created_at"))
+        .annotate(units=Sum("qty"))
+    )
+    rows = list(rows)
+    product_ids = dict(
+        Product.objects.filter(slug__in={row["product_no"] for row in rows}).values_list("slug", "id")
+    )
+    counts = Counter()
+    for row in rows:
+        if row["product_no"] in product_ids:
+            counts[(product_ids[row["product_no"]], row["day"])] += row["units"]
+    return "units_sold", counts
+
+
+def _collect_views(low, high):
+    rows = list(
+        ViewRollup.objects.filter(id__gt=low, id__lte=high)
+        .values("slug", day=TruncDate("bucket"))
+        .annotate(views=Sum("views"))
+    )
+    product_ids = dict(
+        Product.objects.filter(slug__in={row["slug"] for row in rows}).values_list("slug", "id")
+    )
+    counts = Counter()
+    for row in rows:
+        if row["slug"] in product_ids:
+            counts[(product_ids[row["slug"]], row["day"])] += row["views"]
+    return "views", counts
+
+
+def _rank(kind, totals):
+    if kind == Kind.POPULAR:
+        candidates = [row for row in totals if row["units"]]
+        candidates.sort(key=lambda row: (row["units"], row["views"]), reverse=True)
+    else:
+        candidates = [
+            row for row in totals if row["units"] and row["views"] >= settings.PRODUCT_RANKING_MIN_VIEWS
+        ]
+        candidates.sort(key=lambda row: (row["units"] / row["views"], row["units"]), reverse=True)
+    return candidates[: settings.PRODUCT_RANKING_SIZE]
+
+
+def _publish(kind, window_days, ranked):
+    products = Product.objects.in_bulk([row["product"] for row in ranked])
+    results = [
+        {
+            "id": product.id,
+            "slug": product.slug,
+            "name": product.name,
+            "price": str(product.price),
+            "image": product.image_url,
+            "units_sold": row["units"],
+            "views": row["views"],
+        }
+        for row in ranked
+        if (product := products.get(row["product"])) is not None
+    ]
+    snapshot = ProductRanking.objects.create(kind=kind, window_days=window_days, results=results)
+    stale = ProductRanking.objects.filter(kind=kind).order_by("-computed_at").values_list("id", flat=True)
+    ProductRanking.objects.filter(id__in=list(stale[SNAPSHOTS_KEPT:])).delete()
+    entry = _entry(snapshot)
+    cache.set(ranking_cache_key(kind), entry, None)
+    return entry
+
+
+def _entry(snapshot):
+    etag = hashlib.sha256(f"{snapshot.kind}:{snapshot.pk}".encode("utf-8")).hexdigest()
+    return {
+        "results": snapshot.results,
+        "computed_at": snapshot.computed_at,
+        "etag": f'W/"{etag}"',
+    }
+
+
+def refresh_rankings():
+    """Fold new sales/views and recompute every ranking. Returns ``False`` if already running."""
+    if not cache.add(LOCK_KEY, 1, LOCK_SECONDS):
+        return False
+    try:
+        _fold("orders.orderitem", OrderItem, _collect_sales, "order__created_at")
+        _fold("ops.viewrollup", ViewRollup, _collect_views, "created_at")
+
+        window_days = settings.PRODUCT_RANKING_WINDOW_DAYS
+        start = timezone.localdate() - timedelta(days=window_days - 1)
+        ProductDailyStat.objects.filter(day__lt=start).delete()
+        totals = list(
+            ProductDailyStat.objects.filter(day__gte=start)
+            .values("product")
+            .annotate(units=Sum("units_sold"), views=Sum("views"))
+        )
+        for kind in Kind.values:
+            _publish(kind, window_days, _rank(kind, totals))
+        return True
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def get_ranking(kind):
+    """The latest ranking of ``kind`` from the cache, or the latest snapshot."""
+    entry = cache.get(ranking_cache_key(kind))
+    if entry is None:
+        snapshot = ProductRanking.objects.filter(kind=kind).order_by("-computed_at").first()
+        if snapshot is None:
+            return None
+        entry = _entry(snapshot)
+        cache.set(ranking_cache_key(kind), entry, None)
+    return entry
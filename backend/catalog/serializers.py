@@ -17,3 +17,13 @@ class ProductSerializer(serializers.ModelSerializer):
             "stock_qty",
             "updated_at",
         ]
+
+
+class ProductBatchLookupSerializer(serializers.Serializer):
+    slugs = serializers.ListField(
+        child=serializers.SlugField(),
+        allow_empty=False,
+        max_length=200,
+    )
+    # ETags the client already holds; matching products come back without data.
+    etags = serializers.DictField(child=serializers.CharField(), required=False, default=dict)
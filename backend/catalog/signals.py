@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_product
+from .models import Product
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_slug(sender, instance, raw, using, **kwargs):
+    instance._previous_slug = None
+    if instance.pk and not raw:
+        instance._previous_slug = (
+            Product.objects.using(using).filter(pk=instance.pk).values_list("slug", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_detail(sender, instance, using, **kwargs):
+    previous = getattr(instance, "_previous_slug", None)
+    if previous and previous != instance.slug:
+        invalidate_product(previous, using=using)
+    invalidate_product(instance.slug, rebuild=True, using=using)
+
+
+@receiver(post_delete, sender=Product)
+def drop_product_detail(sender, instance, using, **kwargs):
+    invalidate_product(instance.slug, using=using)
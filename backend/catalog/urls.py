@@ -1,7 +1,11 @@
 from django.urls import path
 
-from .views import ProductDetailView
+from .async_views import AsyncProductDetailView
+from .views import ProductBatchView, ProductDetailView, ProductImportView
 
 urlpatterns = [
+    path("batch/", ProductBatchView.as_view(), name="product_batch"),
+    path("import/", ProductImportView.as_view(), name="product_import"),
+    path("async/<slug:slug>/", AsyncProductDetailView.as_view(), name="product_detail_async"),
     path("<slug:slug>/", ProductDetailView.as_view(), name="product_detail"),
 ]
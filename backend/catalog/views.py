@@ -1,64 +1,134 @@
-import hashlib
+import json
 
-from django.core.cache import cache
-from django.http import HttpResponseNotModified
-from django.shortcuts import get_object_or_404
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
-from django.utils.http import http_date
-from django.utils.timezone import is_naive, make_aware
 from django_ratelimit.decorators import ratelimit
+from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ops.models import AuditLog
-from .models import Product
-from .serializers import ProductSerializer
+from accounts.permissions import IsAdmin
+from exbuy_core.db_router import read_from_replica
+from ops import audit, counters
+from .cache import entry_response, get_product_detail, get_product_details
+from .imports import decode_lines, import_products
+from .serializers import ProductBatchLookupSerializer
 
 
 @method_decorator(ratelimit(key="ip", rate="60/m", block=True), name="dispatch")
+@method_decorator(read_from_replica, name="get")
 class ProductDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, slug):
-        cache_key = f"product:detail:{slug}"
-        cached = cache.get(cache_key)
-
-        if cached:
-            data = cached["data"]
-            etag = cached["etag"]
-            last_modified = cached["last_modified"]
-        else:
-            product = get_object_or_404(Product, slug=slug)
-            data = ProductSerializer(product).data
-            last_modified = product.updated_at
-            if is_naive(last_modified):
-                last_modified = make_aware(last_modified)
-            etag_payload = f"{product.id}:{product.updated_at.timestamp()}"
-            etag = f'W/"{hashlib.sha256(etag_payload.encode("utf-8")).hexdigest()}"'
-            cache.set(cache_key, {"data": data, "etag": etag, "last_modified": last_modified}, 300)
-
-        if_none_match = request.headers.get("If-None-Match")
-        if_modified_since = request.headers.get("If-Modified-Since")
-
-        if if_none_match == etag:
-            return HttpResponseNotModified()
-
-        if if_modified_since and http_date(last_modified.timestamp()) == if_modified_since:
-            return HttpResponseNotModified()
-
-        response = Response(data)
-        response["ETag"] = etag
-        response["Last-Modified"] = http_date(last_modified.timestamp())
-
-        AuditLog.objects.create(
-            action="product.view",
-            resource=f"product:{slug}",
-            request_id=getattr(request, "request_id", ""),
-            actor=request.user if request.user.is_authenticated else None,
-            ip_address=request.META.get("REMOTE_ADDR", ""),
-            user_agent=request.META.get("HTTP_USER_AGENT", ""),
-            metadata={"slug": slug},
-        )
+        entry, source = get_product_detail(slug)
+        response = entry_response(request, entry, source)
+        if response.status_code == 304:
+            return response
 
+        counters.count_views([slug], request)
+
+        return response
+
+
+@method_decorator(ratelimit(key="ip", rate="60/m", block=True), name="dispatch")
+@method_decorator(read_from_replica, name="post")
+class ProductBatchView(APIView):
+    """Resolve up to 200 products in one request.
+
+    ``POST {"slugs": [...], "etags": {slug: etag}}`` returns the products in
+    request order, each with its ``etag`` and ``last_modified``. Products
+    whose ETag matches the one sent come back as ``not_modified`` without
+    data; unknown slugs are listed in ``missing``. One rate-limit hit per
+    batch; every product found counts as viewed.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ProductBatchLookupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        slugs = list(dict.fromkeys(serializer.validated_data["slugs"]))
+        known_etags = serializer.validated_data["etags"]
+
+        entries = get_product_details(slugs)
+        renderer = JSONRenderer()
+        results, missing = [], []
+        for slug in slugs:
+            entry = entries.get(slug)
+            if entry is None:
+                missing.append(slug)
+                continue
+            item = {"slug": slug, "etag": entry["etag"], "last_modified": entry["last_modified"]}
+            if known_etags.get(slug) == entry["etag"]:
+                item["not_modified"] = True
+                results.append(renderer.render(item))
+            else:
+                # Splice the cached body in as "data" instead of re-rendering it.
+                results.append(renderer.render(item)[:-1] + b',"data":' + entry["body"] + b"}")
+
+        found = [slug for slug in slugs if slug in entries]
+        if found:
+            counters.count_views(found, request, action="product.view.batch")
+
+        body = b'{"results":[' + b",".join(results) + b'],"missing":' + renderer.render(missing) + b"}"
+        return HttpResponse(body, content_type="application/json")
+
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+}
+
+
+def _import_progress(request, lines, import_format):
+    progress = None
+    for progress in import_products(lines, import_format):
+        yield json.dumps(progress.as_dict()) + "\n"
+
+    audit.record(
+        "product.import",
+        "product:import",
+        request=request,
+        metadata={"format": import_format, **progress.as_dict()},
+    )
+
+
+async def _aimport_progress(progress):
+    # Under ASGI a synchronous iterator would be buffered to the end, so each
+    # chunk runs in the sync thread and its line is sent right away.
+    while (line := await sync_to_async(next)(progress, None)) is not None:
+        yield line
+
+
+class ProductImportView(APIView):
+    """Upsert products by slug from a CSV or NDJSON request body.
+
+    The body is read as it streams in and imported in chunks (see
+    ``catalog.imports``); the response streams one NDJSON progress line per
+    chunk, the last one being the final tally.
+    """
+
+    permission_classes = [IsAdmin]
+
+    def post(self, request):
+        content_type = request.content_type.split(";")[0].strip().lower()
+        import_format = IMPORT_CONTENT_TYPES.get(content_type)
+        if import_format is None:
+            return Response(
+                {"detail": "Send text/csv or application/x-ndjson."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        # Read the raw request, not request.data, so the body is never loaded whole.
+        progress = _import_progress(request, decode_lines(request._request), import_format)
+        if isinstance(request._request, ASGIRequest):
+            progress = _aimport_progress(progress)
+        response = StreamingHttpResponse(progress, content_type="application/x-ndjson")
+        response["X-Accel-Buffering"] = "no"
         return response
@@ -0,0 +1,127 @@
+"""Primary/replica database routing.
+
+Replicas are configured with ``DATABASE_REPLICA_URLS``; without them every
+query goes to ``default`` and nothing here has any effect.
+
+Reads only go to a replica inside code wrapped with :func:`read_from_replica`
+(the read-heavy list/detail views), and never:
+
+* after the current request has written anything, or
+* for ``DATABASE_REPLICA_PIN_SECONDS`` after a previous request from the same
+  client wrote something, so clients always read their own writes despite
+  replication lag.
+
+``exbuy_core.middleware.DatabaseRoutingMiddleware`` tracks both for each
+request.
+"""
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Writes to these models are bookkeeping the client never reads back, so
+# they do not pin the client to the primary.
+UNTRACKED_WRITE_MODELS = {"ops.auditlog"}
+
+
+@dataclass
+class RoutingState:
+    pin_key: str = ""
+    pinned: bool = False
+    wrote: bool = False
+    replica_reads: bool = False
+
+
+_state = ContextVar("db_routing_state", default=None)
+
+
+def default_database_name():
+    """The database ``default`` points at right now (the test runner swaps it)."""
+    return connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+
+
+def begin_request(state):
+    return _state.set(state)
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+def pin_key(request):
+    identity = (
+        request.headers.get("Authorization")
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get("REMOTE_ADDR", "")
+    )
+    return f"db:pin:{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:32]}"
+
+
+@contextmanager
+def replica_reads():
+    state = _state.get()
+    if state is None:
+        token = _state.set(RoutingState(replica_reads=True))
+        try:
+            yield
+        finally:
+            _state.reset(token)
+        return
+
+    previous = state.replica_reads
+    state.replica_reads = True
+    try:
+        yield
+    finally:
+        state.replica_reads = previous
+
+
+def read_from_replica(view):
+    """Let the reads of ``view`` (sync or async) go to a replica."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            with replica_reads():
+                return await view(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = _state.get()
+        if (
+            not settings.DATABASE_REPLICAS
+            or state is None
+            or not state.replica_reads
+            or state.pinned
+            or state.wrote
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None and model._meta.label_lower not in UNTRACKED_WRITE_MODELS:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
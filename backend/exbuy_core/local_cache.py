@@ -0,0 +1,123 @@
+"""Bounded in-process cache tier in front of the shared (Redis) cache.
+
+A :class:`LocalCache` keeps the hottest entries in process memory, so a hit
+costs no network round trip and no unpickling. Entries expire after a short
+TTL and the least recently used ones are evicted beyond ``max_entries``.
+
+Because every process has its own copy, writers call :func:`invalidate`,
+which drops the key locally and publishes it on a Redis channel; a listener
+thread in every process drops it there too. If the listener loses its
+connection it clears all local caches, since messages may have been missed.
+The TTL bounds staleness in the worst case.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from .redis import get_redis
+from .threads import PerProcessThread
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache:invalidate"
+RECONNECT_SECONDS = 1.0
+
+_registry = {}
+
+
+class LocalCache:
+    def __init__(self, name, max_entries=1000, timeout=30):
+        self.name = name
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+        _registry[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, timeout=None):
+        expires = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        _listener.ensure_running()
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "timeout": self.timeout,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def all_stats():
+    return [local_cache.stats() for local_cache in _registry.values()]
+
+
+def invalidate(local_cache, key):
+    """Drop ``key`` from ``local_cache`` in this and every other process."""
+    local_cache.delete(key)
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.publish(CHANNEL, json.dumps({"cache": local_cache.name, "key": key}))
+    except Exception:
+        logger.exception("Could not publish invalidation of %s:%s", local_cache.name, key)
+
+
+def _listen():
+    """Apply invalidations published by other processes to the local caches."""
+    while True:
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            for message in pubsub.listen():
+                _apply(message)
+        except Exception:
+            logger.warning("Local cache invalidation listener disconnected; clearing local caches.")
+        for local_cache in _registry.values():
+            local_cache.clear()
+        time.sleep(RECONNECT_SECONDS)
+
+
+def _apply(message):
+    try:
+        payload = json.loads(message["data"])
+        local_cache = _registry[payload["cache"]]
+    except (KeyError, TypeError, ValueError):
+        return
+    local_cache.delete(payload["key"])
+
+
+_listener = PerProcessThread(_listen, name="local-cache-invalidation", enabled=lambda: get_redis() is not None)
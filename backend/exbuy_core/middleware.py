@@ -1,15 +1,117 @@
 import uuid
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .db_router import RoutingState, begin_request, end_request, pin_key
+
 
 class RequestIdMiddleware:
     """Attach a request ID to each request/response for traceability."""
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        request_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
-        request.request_id = request_id
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_id = self.assign_request_id(request)
         response = self.get_response(request)
         response["X-Request-Id"] = request_id
         return response
+
+    async def __acall__(self, request):
+        request_id = self.assign_request_id(request)
+        response = await self.get_response(request)
+        response["X-Request-Id"] = request_id
+        return response
+
+    @staticmethod
+    def assign_request_id(request):
+        request_id = request.headers.get("X-Request-Id") or str(uuid.uuid4())
+        request.request_id = request_id
+        return request_id
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that can also sit in an async middleware chain.
+
+    Upstream WhiteNoise is sync-only, which makes Django run the whole chain
+    (and every async view behind it) through the single thread-sensitive
+    executor under ASGI. The static file lookup is an in-memory dict hit, so
+    it is safe to do on the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=None):
+        if settings is None:
+            super().__init__(get_response)
+        else:
+            super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class DatabaseRoutingMiddleware:
+    """Track writes per request and pin recent writers to the primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        state = RoutingState(pin_key=pin_key(request))
+        state.pinned = bool(cache.get(state.pin_key))
+        token = begin_request(state)
+        try:
+            return self.get_response(request)
+        finally:
+            end_request(token)
+            if state.wrote:
+                cache.set(state.pin_key, 1, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        state = RoutingState(pin_key=pin_key(request))
+        state.pinned = bool(await cache.aget(state.pin_key))
+        token = begin_request(state)
+        try:
+            return await self.get_response(request)
+        finally:
+            end_request(token)
+            if state.wrote:
+                await cache.aset(state.pin_key, 1, settings.DATABASE_REPLICA_PIN_SECONDS)
@@ -0,0 +1,63 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination on ``(created_at, id)``.
+
+    Every page is a range scan on the matching composite index, so deep pages
+    cost the same as the first one. The total ``count`` is still reported for
+    clients that show it; scrolling clients can skip the ``COUNT(*)`` with
+    ``?count=false``.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if self.include_count(request):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def include_count(self, request):
+        value = request.query_params.get(self.count_query_param, "true")
+        return value.lower() not in ("0", "false", "no")
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count"] = {"type": "integer", "example": 123}
+        return response_schema
+
+
+def encode_keyset_cursor(created_at, pk):
+    return urlsafe_b64encode(f"{created_at.isoformat()}|{pk}".encode("utf-8")).decode("ascii")
+
+
+def decode_keyset_cursor(cursor):
+    """Return ``(created_at, pk)`` from :func:`encode_keyset_cursor` output."""
+    try:
+        created_at, pk = urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeError):
+        raise NotFound("Invalid cursor")
+
+
+def keyset_filter(queryset, cursor):
+    """Rows strictly after ``cursor`` in ``(-created_at, -id)`` order."""
+    created_at, pk = decode_keyset_cursor(cursor)
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
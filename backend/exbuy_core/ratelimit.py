@@ -0,0 +1,19 @@
+import time
+
+from django.core.cache import cache
+
+
+async def ais_ratelimited(request, group, limit, period=60):
+    """
+    Fixed-window per-IP limit for async views, the same policy as
+    ``django_ratelimit``'s ``key="ip"`` but using the async cache API.
+    """
+    window = int(time.time() // period)
+    key = f"rl:{group}:{request.META.get('REMOTE_ADDR', '')}:{window}"
+    await cache.aadd(key, 0, period)
+    try:
+        count = await cache.aincr(key)
+    except ValueError:
+        # The window expired between add and incr.
+        return False
+    return count > limit
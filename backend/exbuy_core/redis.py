@@ -0,0 +1,17 @@
+from functools import lru_cache
+
+from django.conf import settings
+
+
+@lru_cache(maxsize=1)
+def get_redis():
+    """Shared Redis client for ``REDIS_URL``, or ``None`` if the cache is not Redis.
+
+    Local/dev settings may swap the cache for locmem; callers then skip the
+    Redis-only features (pub/sub, ...).
+    """
+    if settings.CACHES["default"]["BACKEND"] != "django.core.cache.backends.redis.RedisCache":
+        return None
+    import redis
+
+    return redis.Redis.from_url(settings.REDIS_URL)
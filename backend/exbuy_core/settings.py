@@ -2,6 +2,7 @@
 Django settings for exbuy_core project.
 """
 
+import json
 import os
 from datetime import timedelta
 from pathlib import Path
@@ -66,7 +67,8 @@ MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "exbuy_core.middleware.RequestIdMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "exbuy_core.middleware.DatabaseRoutingMiddleware",
+    "exbuy_core.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -137,6 +139,24 @@ else:
         }
     }
 
+# Optional read replicas: comma-separated database URLs. Only views wrapped
+# with exbuy_core.db_router.read_from_replica read from them.
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+DATABASE_REPLICAS = []
+for _index, _replica_url in enumerate(DATABASE_REPLICA_URLS):
+    _alias = f"replica_{_index}"
+    DATABASES[_alias] = dj_database_url.parse(_replica_url, conn_max_age=600, ssl_require=True)
+    DATABASES[_alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["exbuy_core.db_router.PrimaryReplicaRouter"]
+# After a write, the same client reads from the primary for this long.
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get("DATABASE_REPLICA_PIN_SECONDS", "5"))
+
 # -----------------------------
 # Cache (Redis)
 # -----------------------------
@@ -149,6 +169,40 @@ CACHES = {
     }
 }
 
+# In-process tier in front of the cache for hot catalog entries
+# (see exbuy_core/local_cache.py).
+CATALOG_LOCAL_CACHE_SIZE = int(os.environ.get("CATALOG_LOCAL_CACHE_SIZE", "1000"))
+CATALOG_LOCAL_CACHE_TIMEOUT = int(os.environ.get("CATALOG_LOCAL_CACHE_TIMEOUT", "30"))
+
+# Popular / analyst's-choice rankings (see catalog/rankings.py).
+PRODUCT_RANKING_WINDOW_DAYS = int(os.environ.get("PRODUCT_RANKING_WINDOW_DAYS", "7"))
+PRODUCT_RANKING_SIZE = int(os.environ.get("PRODUCT_RANKING_SIZE", "12"))
+PRODUCT_RANKING_MIN_VIEWS = int(os.environ.get("PRODUCT_RANKING_MIN_VIEWS", "20"))
+# Rows inserted more recently may still be in an open transaction; folded on a later run.
+PRODUCT_RANKING_SETTLE_SECONDS = int(os.environ.get("PRODUCT_RANKING_SETTLE_SECONDS", "300"))
+
+# Stock reservations (see catalog/inventory.py). Hot SKUs are product slugs
+# whose stock is also counted in Redis in front of the database row.
+STOCK_RESERVATION_SECONDS = int(os.environ.get("STOCK_RESERVATION_SECONDS", "900"))
+STOCK_HOT_SKUS = [
+    slug.strip()
+    for slug in os.environ.get("STOCK_HOT_SKUS", "").split(",")
+    if slug.strip()
+]
+STOCK_GATE_SECONDS = int(os.environ.get("STOCK_GATE_SECONDS", "60"))
+
+# Buffered audit log writer (see ops/audit.py).
+AUDIT_SINK = os.environ.get("AUDIT_SINK", "memory")  # memory, redis or sync
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_SECONDS = float(os.environ.get("AUDIT_FLUSH_SECONDS", "2"))
+AUDIT_OVERFLOW = os.environ.get("AUDIT_OVERFLOW", "drop_oldest")  # drop_oldest, drop_newest or flush
+AUDIT_RETENTION_DAYS = int(os.environ.get("AUDIT_RETENTION_DAYS", "90"))
+
+# Product view counters (see ops/counters.py).
+VIEW_COUNTER_FLUSH_SECONDS = int(os.environ.get("VIEW_COUNTER_FLUSH_SECONDS", "60"))
+VIEW_AUDIT_SAMPLE_RATE = float(os.environ.get("VIEW_AUDIT_SAMPLE_RATE", "0.01"))
+
 # -----------------------------
 # Password validation
 # -----------------------------
@@ -196,6 +250,19 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# -----------------------------
+# Orders
+# -----------------------------
+ORDER_BULK_MAX_BATCH = int(os.environ.get("ORDER_BULK_MAX_BATCH", "500"))
+# AWB numbers and order codes reserved per process at a time.
+ORDER_ID_BLOCK_SIZE = int(os.environ.get("ORDER_ID_BLOCK_SIZE", "1000"))
+
+# Private key(s) for client-encrypted order payloads. Clients name the key
+# with "kid"; older keys stay in ORDER_PAYLOAD_PRIVATE_KEYS during rotation.
+ORDER_PAYLOAD_PRIVATE_KEY = os.environ.get("ORDER_PAYLOAD_PRIVATE_KEY", "")
+ORDER_PAYLOAD_KEY_ID = os.environ.get("ORDER_PAYLOAD_KEY_ID", "default")
+ORDER_PAYLOAD_PRIVATE_KEYS = json.loads(os.environ.get("ORDER_PAYLOAD_PRIVATE_KEYS", "{}"))
+
 # -----------------------------
 # drf-spectacular settings
 # -----------------------------
@@ -0,0 +1,38 @@
+"""Background threads that follow the process across forks.
+
+Threads do not survive a fork, so a thread started in the master process of
+a pre-forking server does not run in its workers. :class:`PerProcessThread`
+remembers which process started its thread and starts a new one the first
+time it is needed in any other process.
+"""
+import os
+import threading
+
+
+class PerProcessThread:
+    """Runs ``target`` in one daemon thread per process, started lazily.
+
+    ``after_fork`` runs in a forked child before its thread starts, to drop
+    state copied from the parent (the parent still handles that state).
+    While ``enabled`` returns false nothing is started; it is asked again on
+    the next :meth:`ensure_running`.
+    """
+
+    def __init__(self, target, name, after_fork=None, enabled=None):
+        self.target = target
+        self.name = name
+        self.after_fork = after_fork
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_running(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid() or (self.enabled is not None and not self.enabled()):
+                return
+            if self._pid is not None and self.after_fork is not None:
+                self.after_fork()
+            self._pid = os.getpid()
+            threading.Thread(target=self.target, name=self.name, daemon=True).start()
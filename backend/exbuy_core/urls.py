@@ -32,9 +32,9 @@ urlpatterns = [
     path("api/accounts/", include("accounts.urls")),
     path("api/merchants/", include("merchants.urls")),
     path("api/orders/", include("orders.urls")),
-    path("api/products/", include("catalog.urls")),
     path("api/products/popular/", popular_products, name="popular_products"),
     path("api/products/analyst/", analyst_choice, name="analyst_choice"),
+    path("api/products/", include("catalog.urls")),
     path("api/shipments/", include("shipments.urls")),
     path("api/billing/", include("billing.urls")),
     path("api/tracking/", include("tracking.urls")),
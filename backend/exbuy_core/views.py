@@ -1,55 +1,48 @@
 """Core API views for Exbuy."""
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import http_date
 from django.views.decorators.http import require_GET
 
+from catalog.models import ProductRanking
+from catalog.rankings import get_ranking
+from exbuy_core.db_router import read_from_replica
 from merchants.models import Merchant
 from orders.models import Order
 
 
+RANKING_MAX_AGE = 60
+
+
+def _ranking_response(request, kind):
+    entry = get_ranking(kind)
+    if entry is None:
+        response = JsonResponse({"results": []})
+    elif request.headers.get("If-None-Match") == entry["etag"]:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({"results": entry["results"]})
+    if entry is not None:
+        response["ETag"] = entry["etag"]
+        response["Last-Modified"] = http_date(entry["computed_at"].timestamp())
+    response["Cache-Control"] = f"public, max-age={RANKING_MAX_AGE}"
+    return response
+
+
 @require_GET
-def popular_products(_request):
-    """Return demo popular products for the home page."""
-    return JsonResponse({
-        "results": [
-            {
-                "id": 1,
-                "name": "Smartwatch",
-                "price": "3.75",
-                "image": "/static/demo/watch.jpg",
-            },
-            {
-                "id": 2,
-                "name": "Smart Glasses",
-                "price": "44.9",
-                "image": "/static/demo/glasses.jpg",
-            },
-        ]
-    })
+def popular_products(request):
+    """Return the best-selling products of the ranking window (see ``catalog.rankings``)."""
+    return _ranking_response(request, ProductRanking.Kind.POPULAR)
 
 
 @require_GET
-def analyst_choice(_request):
-    """Return demo analyst choice products for the home page."""
-    return JsonResponse({
-        "results": [
-            {
-                "id": 3,
-                "name": "Perfume Bottle",
-                "price": "0.1",
-                "image": "/static/demo/perfume.jpg",
-            },
-            {
-                "id": 4,
-                "name": "CeraVe Skincare",
-                "price": "2.0",
-                "image": "/static/demo/cerave.jpg",
-            },
-        ]
-    })
+def analyst_choice(request):
+    """Return the products that convert views into sales best (see ``catalog.rankings``)."""
+    return _ranking_response(request, ProductRanking.Kind.ANALYST_CHOICE)
 
 
 @login_required
+@read_from_replica
 def home(request):
     """Return dashboard data based on the authenticated user's role."""
     role = getattr(request.user, "role", "guest")
@@ -1,4 +1,8 @@
+from django.utils.decorators import method_decorator
 from rest_framework import viewsets, permissions
+
+from exbuy_core.db_router import read_from_replica
+
 from .models import Merchant
 from .serializers import MerchantSerializer
 
@@ -7,5 +11,9 @@ class MerchantViewSet(viewsets.ModelViewSet):
     serializer_class = MerchantSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(read_from_replica)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 # Create your views here.
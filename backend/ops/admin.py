@@ -1,9 +1,16 @@
 from django.contrib import admin
 
-from .models import AuditLog
+from .models import AuditLog, ViewRollup
 
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
     list_display = ("action", "resource", "actor", "request_id", "created_at")
     search_fields = ("action", "resource", "request_id")
+
+
+@admin.register(ViewRollup)
+class ViewRollupAdmin(admin.ModelAdmin):
+    list_display = ("slug", "bucket", "views", "unique_viewers")
+    search_fields = ("slug",)
+    date_hierarchy = "bucket"
@@ -0,0 +1,270 @@
+"""Buffered ``AuditLog`` writer.
+
+Request paths call :func:`record` (or :func:`arecord`), which only queues
+the event; a background thread in each process writes queued events with
+``bulk_create`` once ``AUDIT_BATCH_SIZE`` are waiting or every
+``AUDIT_FLUSH_SECONDS``, and whatever is left is flushed at exit. Events keep
+the time they were recorded, not the time they were written.
+
+``AUDIT_SINK`` selects where events wait:
+
+- ``memory``: a per-process queue. Events of a process that is killed
+  without running its exit handlers are lost.
+- ``redis``: a shared Redis list every process pushes to and drains, so
+  events of a crashed process are written by the others.
+- ``sync``: written immediately, one INSERT per event (tests, debugging).
+
+The queue holds at most ``AUDIT_QUEUE_SIZE`` events. When it is full,
+``AUDIT_OVERFLOW`` decides: ``drop_oldest`` or ``drop_newest`` discard
+events (counted in :func:`stats`), ``flush`` makes the caller write a batch
+before queueing.
+"""
+import atexit
+import json
+import logging
+import threading
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from exbuy_core.db_router import default_database_name
+from exbuy_core.redis import get_redis
+from exbuy_core.threads import PerProcessThread
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY = "audit:events"
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "flush")
+
+# Pushes an event unless the list is full; returns 1 if it was pushed.
+_PUSH_SCRIPT = """
+if redis.call('LLEN', KEYS[1]) >= tonumber(ARGV[2]) then return 0 end
+redis.call('RPUSH', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def _event(action, resource, request=None, actor=None, metadata=None):
+    if request is not None and actor is None:
+        user = getattr(request, "user", None)
+        actor = user if user is not None and user.is_authenticated else None
+    meta = request.META if request is not None else {}
+    return {
+        "action": action,
+        "resource": resource,
+        "request_id": getattr(request, "request_id", ""),
+        "actor_id": actor.pk if actor is not None else None,
+        "ip_address": meta.get("REMOTE_ADDR", "")[:45],
+        "user_agent": meta.get("HTTP_USER_AGENT", "")[:300],
+        "metadata": metadata or {},
+        "created_at": timezone.now(),
+    }
+
+
+def _write(events):
+    AuditLog.objects.bulk_create([AuditLog(**event) for event in events], batch_size=settings.AUDIT_BATCH_SIZE)
+
+
+class MemoryQueue:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._events)
+
+    def push(self, event, drop_oldest):
+        """Queue ``event``; returns whether something was dropped to make room."""
+        with self._lock:
+            if len(self._events) < self.max_size:
+                self._events.append(event)
+                return False
+            if drop_oldest:
+                self._events.popleft()
+                self._events.append(event)
+            return True
+
+    def pop(self, count):
+        with self._lock:
+            return [self._events.popleft() for _ in range(min(count, len(self._events)))]
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def requeue(self, events):
+        with self._lock:
+            room = self.max_size - len(self._events)
+            self._events.extendleft(reversed(events[:room]))
+
+
+class RedisQueue:
+    def __init__(self, max_size):
+        self.max_size = max_size
+
+    def __len__(self):
+        return get_redis().llen(REDIS_KEY)
+
+    def push(self, event, drop_oldest):
+        client = get_redis()
+        payload = json.dumps({**event, "created_at": event["created_at"].isoformat()})
+        if drop_oldest:
+            pipe = client.pipeline()
+            pipe.rpush(REDIS_KEY, payload)
+            pipe.ltrim(REDIS_KEY, -self.max_size, -1)
+            length, _trimmed = pipe.execute()
+            return length > self.max_size
+        return not client.eval(_PUSH_SCRIPT, 1, REDIS_KEY, payload, self.max_size)
+
+    def pop(self, count):
+        events = []
+        for payload in get_redis().lpop(REDIS_KEY, count) or []:
+            event = json.loads(payload)
+            event["created_at"] = parse_datetime(event["created_at"])
+            events.append(event)
+        return events
+
+    def requeue(self, events):
+        payloads = [json.dumps({**event, "created_at": event["created_at"].isoformat()}) for event in events]
+        if payloads:
+            get_redis().lpush(REDIS_KEY, *reversed(payloads))
+
+
+class AuditSink:
+    def __init__(self, queue, batch_size, flush_seconds, overflow):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"AUDIT_OVERFLOW must be one of {', '.join(OVERFLOW_POLICIES)}.")
+        self.queue = queue
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.overflow = overflow
+        self.recorded = self.written = self.dropped = self.failed = 0
+        # The database events were recorded against; see _flush_at_exit.
+        self.database = None
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        # A forked worker drops the copied in-memory queue; the parent process writes it.
+        self._flusher = PerProcessThread(
+            self._run, name="audit-flush", after_fork=queue.clear if isinstance(queue, MemoryQueue) else None
+        )
+
+    def push(self, event):
+        self._flusher.ensure_running()
+        self.database = default_database_name()
+        self.recorded += 1
+        if self.overflow == "flush" and len(self.queue) >= self.queue.max_size:
+            self.flush(self.batch_size)
+        try:
+            dropped = self.queue.push(event, drop_oldest=self.overflow != "drop_newest")
+        except Exception:
+            # Auditing must not fail the request (e.g. Redis is unreachable).
+            logger.exception("Could not queue audit event %s", event["action"])
+            dropped = True
+        if dropped:
+            self.dropped += 1
+        if len(self.queue) >= self.batch_size:
+            self._wake.set()
+
+    def flush(self, limit=None):
+        """Write queued events in batches (at most ``limit``); returns how many were written."""
+        written = 0
+        with self._flush_lock:
+            while limit is None or written < limit:
+                events = self.queue.pop(self.batch_size if limit is None else min(self.batch_size, limit - written))
+                if not events:
+                    break
+                try:
+                    _write(events)
+                except Exception:
+                    # Keep the batch for the next attempt (as far as there is room).
+                    self.queue.requeue(events)
+                    self.failed += 1
+                    logger.exception("Could not write %d audit events", len(events))
+                    break
+                written += len(events)
+        self.written += written
+        return written
+
+    def stats(self):
+        return {
+            "sink": settings.AUDIT_SINK,
+            "queued": len(self.queue),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed,
+        }
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed")
+            finally:
+                close_old_connections()
+
+
+def _build_sink():
+    if settings.AUDIT_SINK == "sync":
+        return None
+    queue_class = RedisQueue if settings.AUDIT_SINK == "redis" and get_redis() is not None else MemoryQueue
+    return AuditSink(
+        queue_class(settings.AUDIT_QUEUE_SIZE),
+        batch_size=settings.AUDIT_BATCH_SIZE,
+        flush_seconds=settings.AUDIT_FLUSH_SECONDS,
+        overflow=settings.AUDIT_OVERFLOW,
+    )
+
+
+sink = _build_sink()
+
+
+def record(action, resource, request=None, actor=None, metadata=None):
+    """Queue an audit event; the actor defaults to the request's authenticated user."""
+    event = _event(action, resource, request=request, actor=actor, metadata=metadata)
+    if sink is None:
+        _write([event])
+    else:
+        sink.push(event)
+
+
+async def arecord(action, resource, request=None, actor=None, metadata=None):
+    """Async :func:`record`; only touches the database or Redis off the event loop."""
+    if sink is not None and isinstance(sink.queue, MemoryQueue) and sink.overflow != "flush":
+        record(action, resource, request=request, actor=actor, metadata=metadata)
+    else:
+        await sync_to_async(record)(action, resource, request=request, actor=actor, metadata=metadata)
+
+
+def flush():
+    """Write everything queued in this process (or the shared Redis list)."""
+    return 0 if sink is None else sink.flush()
+
+
+def stats():
+    return sink.stats() if sink is not None else {"sink": "sync"}
+
+
+@atexit.register
+def _flush_at_exit():
+    if sink is None:
+        return
+    if sink.database is not None and sink.database != default_database_name():
+        # e.g. after ``manage.py test``: the test database is gone and
+        # ``default`` points at the real one again.
+        logger.warning("Not flushing audit events recorded against another database")
+        return
+    try:
+        flush()
+    except Exception:
+        logger.exception("Could not flush audit events at exit")
@@ -0,0 +1,267 @@
+"""Aggregated product view counters.
+
+:func:`count_views` adds a view to a per-minute Redis hash (``views:<minute>``,
+field = slug) and the viewer to a HyperLogLog per slug and minute, instead of
+writing an ``AuditLog`` row per view. Only a ``VIEW_AUDIT_SAMPLE_RATE``
+sample of views is still recorded in the audit log.
+
+:func:`flush` moves finished minutes into ``ViewRollup`` rows (one per slug
+and minute, with the view count and the estimated distinct viewers). Every
+process runs it in a background thread every ``VIEW_COUNTER_FLUSH_SECONDS``;
+``flush_view_counters`` runs it on demand. A minute is claimed by removing
+it from the ``views:buckets`` set, so concurrent flushers never write it
+twice. The counts are only deleted once their rows are written; if the
+write fails they are put back for the next flush.
+
+Without Redis (local/dev settings) each process counts in memory and flushes
+its own counts; distinct viewers are then exact per process.
+"""
+import atexit
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from exbuy_core.db_router import default_database_name
+from exbuy_core.redis import get_redis
+from exbuy_core.threads import PerProcessThread
+from . import audit
+from .models import ViewRollup
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60
+# Views may still land in a minute shortly after it ends (slow requests).
+GRACE_SECONDS = 5
+# Counters a dead flusher never collected are dropped after this.
+KEY_TIMEOUT = 60 * 60 * 24
+BUCKETS_KEY = "views:buckets"
+
+
+def _counts_key(bucket):
+    return f"views:{bucket}"
+
+
+def _viewers_key(bucket, slug):
+    return f"views:{bucket}:viewers:{slug}"
+
+
+def _bucket(now=None):
+    now = time.time() if now is None else now
+    return int(now // BUCKET_SECONDS) * BUCKET_SECONDS
+
+
+def viewer_key(request):
+    """The user id, or a hash of the IP address and user agent for anonymous viewers."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    meta = request.META
+    anonymous = f"{meta.get('REMOTE_ADDR', '')}|{meta.get('HTTP_USER_AGENT', '')}"
+    return f"anon:{hashlib.sha1(anonymous.encode('utf-8')).hexdigest()}"
+
+
+class RedisCounters:
+    def add(self, bucket, slugs, viewer):
+        pipe = get_redis().pipeline(transaction=False)
+        for slug in slugs:
+            pipe.hincrby(_counts_key(bucket), slug, 1)
+            pipe.pfadd(_viewers_key(bucket, slug), viewer)
+            pipe.expire(_viewers_key(bucket, slug), KEY_TIMEOUT)
+        pipe.expire(_counts_key(bucket), KEY_TIMEOUT)
+        pipe.sadd(BUCKETS_KEY, bucket)
+        pipe.execute()
+
+    def drain(self, before):
+        """Claim the buckets before ``before``; returns ``(bucket, slug, views, unique_viewers)`` rows.
+
+        The viewer HyperLogLogs are kept until :meth:`done`, so :meth:`restore`
+        can put the rows back if they could not be written.
+        """
+        client = get_redis()
+        rows = []
+        for bucket in sorted(int(member) for member in client.smembers(BUCKETS_KEY)):
+            if bucket >= before or not client.srem(BUCKETS_KEY, bucket):
+                continue  # still open, or claimed by another flusher
+            pipe = client.pipeline()  # MULTI: no increment slips between the read and the delete
+            pipe.hgetall(_counts_key(bucket))
+            pipe.delete(_counts_key(bucket))
+            counts, _deleted = pipe.execute()
+            slugs = [slug.decode("utf-8") for slug in counts]
+            pipe = client.pipeline(transaction=False)
+            for slug in slugs:
+                pipe.pfcount(_viewers_key(bucket, slug))
+            for slug, unique_viewers in zip(slugs, pipe.execute()):
+                rows.append((bucket, slug, int(counts[slug.encode("utf-8")]), unique_viewers))
+        return rows
+
+    def done(self, rows):
+        if rows:
+            get_redis().delete(*(_viewers_key(bucket, slug) for bucket, slug, _views, _unique in rows))
+
+    def restore(self, rows):
+        pipe = get_redis().pipeline(transaction=False)
+        for bucket, slug, views, _unique_viewers in rows:
+            pipe.hincrby(_counts_key(bucket), slug, views)
+            pipe.expire(_counts_key(bucket), KEY_TIMEOUT)
+            pipe.sadd(BUCKETS_KEY, bucket)
+        pipe.execute()
+
+
+class MemoryCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = defaultdict(lambda: defaultdict(lambda: [0, set()]))
+        # Drained buckets not written yet: ``restore`` puts them back.
+        self._claimed = {}
+
+    def add(self, bucket, slugs, viewer):
+        with self._lock:
+            for slug in slugs:
+                counter = self._buckets[bucket][slug]
+                counter[0] += 1
+                counter[1].add(viewer)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._claimed.clear()
+
+    def drain(self, before):
+        with self._lock:
+            done = {bucket: self._buckets.pop(bucket) for bucket in sorted(self._buckets) if bucket < before}
+            self._claimed.update(done)
+        return [
+            (bucket, slug, views, len(viewers))
+            for bucket, slugs in done.items()
+            for slug, (views, viewers) in slugs.items()
+        ]
+
+    def done(self, rows):
+        with self._lock:
+            for bucket in {row[0] for row in rows}:
+                self._claimed.pop(bucket, None)
+
+    def restore(self, rows):
+        with self._lock:
+            for bucket in {row[0] for row in rows}:
+                for slug, (views, viewers) in self._claimed.pop(bucket, {}).items():
+                    counter = self._buckets[bucket][slug]
+                    counter[0] += views
+                    counter[1].update(viewers)
+
+
+def _run_flusher():
+    while True:
+        time.sleep(settings.VIEW_COUNTER_FLUSH_SECONDS)
+        close_old_connections()
+        try:
+            flush()
+        except Exception:
+            logger.exception("View counter flush failed")
+        finally:
+            close_old_connections()
+
+
+_memory_counters = MemoryCounters()
+# The database views were counted against; see _flush_at_exit.
+_counted_for = None
+# A forked worker drops the copied counts; the parent process writes them.
+_flusher = PerProcessThread(_run_flusher, name="view-counter-flush", after_fork=_memory_counters.clear)
+
+
+def _counters():
+    return RedisCounters() if get_redis() is not None else _memory_counters
+
+
+def _add(slugs, request):
+    global _counted_for
+    _flusher.ensure_running()
+    _counted_for = default_database_name()
+    try:
+        _counters().add(_bucket(), slugs, viewer_key(request))
+    except Exception:
+        # Counting must not fail the request (e.g. Redis is unreachable).
+        logger.exception("Could not count views of %s", ", ".join(slugs))
+
+
+def _sample(slugs):
+    """Audit log arguments for a sampled view, or ``None`` if this view is not sampled."""
+    if random.random() >= settings.VIEW_AUDIT_SAMPLE_RATE:
+        return None
+    resource = f"product:{slugs[0]}" if len(slugs) == 1 else "product:batch"
+    metadata = {"slug": slugs[0]} if len(slugs) == 1 else {"slugs": list(slugs)}
+    return resource, {**metadata, "sampled": True}
+
+
+def count_views(slugs, request, action="product.view"):
+    """Count a view of each of ``slugs``; a sample also goes to the audit log."""
+    _add(slugs, request)
+    sample = _sample(slugs)
+    if sample is not None:
+        resource, metadata = sample
+        audit.record(action, resource, request=request, metadata=metadata)
+
+
+async def acount_views(slugs, request, action="product.view"):
+    """Async :func:`count_views`; Redis and the database are only used off the event loop."""
+    if get_redis() is None:
+        _add(slugs, request)
+    else:
+        await sync_to_async(_add, thread_sensitive=False)(slugs, request)
+    sample = _sample(slugs)
+    if sample is not None:
+        resource, metadata = sample
+        await audit.arecord(action, resource, request=request, metadata=metadata)
+
+
+def flush(before=None):
+    """Write the minutes before ``before`` (default: the finished ones) to ``ViewRollup``.
+
+    Returns the number of rows written.
+    """
+    if before is None:
+        before = _bucket(time.time() - GRACE_SECONDS)
+    counters = _counters()
+    drained = counters.drain(before)
+    rows = [
+        ViewRollup(
+            slug=slug,
+            bucket=datetime.fromtimestamp(bucket, tz=dt_timezone.utc),
+            views=views,
+            unique_viewers=unique_viewers,
+        )
+        for bucket, slug, views, unique_viewers in drained
+    ]
+    try:
+        ViewRollup.objects.bulk_create(rows, batch_size=1000)
+    except Exception:
+        # Keep the counts for the next flush instead of losing them.
+        counters.restore(drained)
+        raise
+    counters.done(drained)
+    return len(rows)
+
+
+@atexit.register
+def _flush_at_exit():
+    # In-process counts would be lost; Redis counts are flushed by the other processes.
+    if get_redis() is not None:
+        return
+    if _counted_for is not None and _counted_for != default_database_name():
+        # e.g. after ``manage.py test``: the test database is gone and
+        # ``default`` points at the real one again.
+        logger.warning("Not flushing view counters counted against another database")
+        return
+    try:
+        flush(before=math.inf)
+    except Exception:
+        logger.exception("Could not flush view counters at exit")
@@ -0,0 +1,14 @@
+import django_filters
+
+from .models import AuditLog
+
+
+class AuditLogFilter(django_filters.FilterSet):
+    # Exact matches only, so every filter is served by an index.
+    actor = django_filters.NumberFilter(field_name="actor_id")
+    created_after = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+
+    class Meta:
+        model = AuditLog
+        fields = ["action", "resource", "request_id", "actor"]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ops.counters import flush
+
+
+class Command(BaseCommand):
+    help = "Write the finished minutes of the product view counters to the view rollups."
+
+    def handle(self, *args, **options):
+        rows = flush()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} view rollup rows."))
@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ops.models import AuditLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete audit entries older than the retention period in small batches, each its own "
+        "short transaction, pausing between batches so replicas and WAL archiving keep up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.AUDIT_RETENTION_DAYS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--pause", type=float, default=0.1, help="Seconds to wait between batches.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        expired = AuditLog.objects.filter(created_at__lt=cutoff)
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} audit entries older than {cutoff:%Y-%m-%d %H:%M} would be deleted.")
+            return
+
+        deleted = 0
+        while True:
+            # Oldest first along auditlog_created_id_idx; ids keep each DELETE to one batch.
+            batch = list(expired.order_by("created_at", "id").values_list("id", flat=True)[: options["batch_size"]])
+            if not batch:
+                break
+            deleted += AuditLog.objects.filter(id__in=batch).delete()[0]
+            self.stdout.write(f"Deleted {deleted} audit entries...")
+            time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} audit entries."))
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ops", "0002_auditlog_created_at_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ViewRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("slug", models.CharField(max_length=50)),
+                ("bucket", models.DateTimeField()),
+                ("views", models.PositiveIntegerField()),
+                ("unique_viewers", models.PositiveIntegerField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["slug", "bucket"], name="view_rollup_slug_bucket_idx"),
+                    models.Index(fields=["bucket"], name="view_rollup_bucket_idx"),
+                ],
+            },
+        ),
+    ]
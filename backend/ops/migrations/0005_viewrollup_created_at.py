@@ -0,0 +1,16 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ops", "0004_auditlog_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="viewrollup",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class AuditLog(models.Model):
@@ -16,7 +17,41 @@ class AuditLog(models.Model):
     ip_address = models.CharField(max_length=45, blank=True, default="")
     user_agent = models.CharField(max_length=300, blank=True, default="")
     metadata = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set by the audit sink when the event happens, not when it is flushed.
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the audit query API and retention walk these.
+            models.Index(fields=["-created_at", "-id"], name="auditlog_created_id_idx"),
+            models.Index(fields=["action", "-created_at", "-id"], name="auditlog_action_created_idx"),
+            models.Index(fields=["resource", "-created_at", "-id"], name="auditlog_resource_created_idx"),
+            models.Index(fields=["request_id"], name="auditlog_request_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.action} {self.resource}"
+
+
+class ViewRollup(models.Model):
+    """Product views per slug per minute, flushed from the view counters (see ``counters``).
+
+    Rows are only appended: views that arrive after their minute was flushed
+    add another row for it, so readers sum over ``(slug, bucket)``.
+    """
+
+    slug = models.CharField(max_length=50)
+    bucket = models.DateTimeField()
+    views = models.PositiveIntegerField()
+    # HyperLogLog estimate of the distinct viewers in the bucket.
+    unique_viewers = models.PositiveIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["slug", "bucket"], name="view_rollup_slug_bucket_idx"),
+            models.Index(fields=["bucket"], name="view_rollup_bucket_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.slug} @ {self.bucket:%Y-%m-%d %H:%M}: {self.views}"
@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+from .models import AuditLog
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditLog
+        fields = [
+            "id",
+            "action",
+            "resource",
+            "request_id",
+            "actor",
+            "ip_address",
+            "user_agent",
+            "metadata",
+            "created_at",
+        ]
@@ -1,7 +1,9 @@
 from django.urls import path
 
-from .views import health
+from .views import AuditLogListView, cache_stats, health
 
 urlpatterns = [
     path("health/", health, name="health"),
+    path("cache-stats/", cache_stats, name="cache-stats"),
+    path("audit-logs/", AuditLogListView.as_view(), name="audit-log-list"),
 ]
@@ -1,5 +1,43 @@
+import os
+
 from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from rest_framework import generics
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from accounts.permissions import IsOpsOrAdmin
+from exbuy_core.db_router import read_from_replica
+from exbuy_core.local_cache import all_stats
+from exbuy_core.pagination import KeysetPagination
+from . import audit
+from .filters import AuditLogFilter
+from .models import AuditLog
+from .serializers import AuditLogSerializer
 
 
 def health(request):
     return JsonResponse({"status": "ok"})
+
+
+@api_view(["GET"])
+@permission_classes([IsOpsOrAdmin])
+def cache_stats(request):
+    """Hit/miss counters of this worker process's in-process caches and audit queue."""
+    return Response({"pid": os.getpid(), "caches": all_stats(), "audit": audit.stats()})
+
+
+@method_decorator(read_from_replica, name="get")
+class AuditLogListView(generics.ListAPIView):
+    """Audit entries, newest first, filtered by action, resource, request id, actor and time.
+
+    Keyset-paginated on ``(created_at, id)``; every filter combination is a
+    range scan on one of the ``AuditLog`` indexes. Pass ``?count=false`` to
+    skip the total on large ranges.
+    """
+
+    queryset = AuditLog.objects.all()
+    serializer_class = AuditLogSerializer
+    permission_classes = [IsOpsOrAdmin]
+    pagination_class = KeysetPagination
+    filterset_class = AuditLogFilter
@@ -1,7 +1,12 @@
 # backend/orders/admin.py
+import uuid
+
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Order, OrderItem
+from .models import ArchivedOrder, Order, OrderItem
+from .search import MIN_QUERY_LENGTH, matching_orders
+from .totals import recompute_totals
+from .transitions import bulk_transition
 
 
 # ---------------------------
@@ -21,19 +26,27 @@ class OrderItemInline(admin.TabularInline):
 # ---------------------------
 # Custom Admin Actions
 # ---------------------------
+def _transition_action(modeladmin, request, queryset, target, label, **extra_updates):
+    selected = queryset.count()
+    result = bulk_transition(queryset, target, note=f"Admin: {request.user}", **extra_updates)
+    message = f"{result.count} orders marked as {label}."
+    if result.count < selected:
+        message += f" {selected - result.count} skipped (transition not allowed)."
+    modeladmin.message_user(request, message)
+
 def mark_as_paid(modeladmin, request, queryset):
-    queryset.update(status=Order.Status.PAID)
-    modeladmin.message_user(request, f"{queryset.count()} orders marked as Paid.")
+    _transition_action(
+        modeladmin, request, queryset, Order.OrderStatus.PURCHASED, "Paid",
+        payment_status=Order.PaymentStatus.PAID,
+    )
 mark_as_paid.short_description = "Mark selected orders as Paid"
 
 def mark_as_shipped(modeladmin, request, queryset):
-    queryset.update(status=Order.Status.SHIPPED)
-    modeladmin.message_user(request, f"{queryset.count()} orders marked as Shipped.")
+    _transition_action(modeladmin, request, queryset, Order.OrderStatus.WAY, "Shipped")
 mark_as_shipped.short_description = "Mark selected orders as Shipped"
 
 def mark_as_cancelled(modeladmin, request, queryset):
-    queryset.update(status=Order.Status.CANCELLED)
-    modeladmin.message_user(request, f"{queryset.count()} orders marked as Cancelled.")
+    _transition_action(modeladmin, request, queryset, Order.OrderStatus.CANCELLED, "Cancelled")
 mark_as_cancelled.short_description = "Mark selected orders as Cancelled"
 
 
@@ -49,34 +62,54 @@ class OrderAdmin(admin.ModelAdmin):
         "payment_method",
         "colored_status",
         "colored_total",   # ✅ gradient badge for total
+        "item_count",
         "created_at",
     )
-    list_filter = ("payment_method", "status", "city", "created_at")
+    list_filter = ("payment_method", "order_status", "payment_status", "city", "created_at")
     search_fields = ("order_id", "customer_name", "address", "city", "postal_code")
     ordering = ("-created_at",)
     date_hierarchy = "created_at"
 
     inlines = [OrderItemInline]
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = ("total", "item_count", "weight_kg", "created_at", "updated_at")
 
     actions = [mark_as_paid, mark_as_shipped, mark_as_cancelled]
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Item edits in the inline change the derived totals.
+        recompute_totals([form.instance.pk])
+
+    # ---------------------------
+    # Indexed Search (see orders/search.py)
+    # ---------------------------
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        try:
+            return queryset.filter(order_id=uuid.UUID(term)), False
+        except ValueError:
+            pass
+        if len(term) >= MIN_QUERY_LENGTH:
+            return matching_orders(queryset, term), False
+        return super().get_search_results(request, queryset, search_term)
+
     # ---------------------------
     # Colored Status Badge
     # ---------------------------
     def colored_status(self, obj):
         color_map = {
-            Order.Status.PENDING: "orange",
-            Order.Status.PAID: "green",
-            Order.Status.SHIPPED: "blue",
-            Order.Status.CANCELLED: "red",
+            Order.OrderStatus.TO_PAY: "orange",
+            Order.OrderStatus.PURCHASED: "green",
+            Order.OrderStatus.WAY: "blue",
+            Order.OrderStatus.COMPLETED: "teal",
+            Order.OrderStatus.CANCELLED: "red",
         }
-        color = color_map.get(obj.status, "gray")
+        color = color_map.get(obj.order_status, "gray")
         return format_html(
             '<span style="color: white; background-color: {}; '
             'padding: 3px 8px; border-radius: 8px; font-weight: bold;">{}</span>',
             color,
-            obj.get_status_display(),
+            obj.get_order_status_display(),
         )
     colored_status.short_description = "Status"
 
@@ -110,9 +143,27 @@ class OrderAdmin(admin.ModelAdmin):
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ("order", "name", "price", "qty", "subtotal_display")
+    list_select_related = ("order",)
     search_fields = ("name", "order__order_id")
-    list_filter = ("order__status", "order__payment_method")
+    list_filter = ("order__order_status", "order__payment_method")
 
     def subtotal_display(self, obj):
         return obj.subtotal()
     subtotal_display.short_description = "Subtotal"
+
+
+# ---------------------------
+# Archived Orders (read-only)
+# ---------------------------
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ("order_code", "awb", "merchant", "order_status", "created_at", "archived_at")
+    list_filter = ("order_status",)
+    search_fields = ("=order_code", "=awb", "=order_id")
+    date_hierarchy = "created_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,114 @@
+"""Block allocation of AWB numbers and order codes.
+
+Each process reserves a block of ``ORDER_ID_BLOCK_SIZE`` numbers from an
+``IdentifierSequence`` row with one UPDATE and then hands identifiers out of
+that block from memory, so creating an order does not touch the sequence
+row. Blocks never overlap, so identifiers never collide; numbers left in a
+block when a process exits are skipped.
+
+The reservation runs on its own thread, and therefore its own database
+connection, so it commits immediately. If it ran inside the caller's
+transaction, a rollback would return the block to the sequence while this
+process kept handing out numbers from it. SQLite is the exception: it
+allows a single writer, so a second connection cannot write while the
+caller's transaction has, and blocks are reserved inline instead. A block
+reserved inside the caller's transaction is only used until that
+transaction (or the savepoint it was reserved in) rolls back, since the
+sequence gives it out again after that.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+
+from .models import IdentifierSequence
+
+
+def _reserve_block(name, size):
+    using = router.db_for_write(IdentifierSequence)
+    with transaction.atomic(using=using):
+        sequences = IdentifierSequence.objects.using(using).filter(name=name)
+        if not sequences.update(next_value=F("next_value") + size):
+            try:
+                with transaction.atomic(using=using):
+                    IdentifierSequence.objects.using(using).create(name=name, next_value=1 + size)
+                return 1, 1 + size
+            except IntegrityError:
+                # Another process created the row first.
+                sequences.update(next_value=F("next_value") + size)
+        end = sequences.values_list("next_value", flat=True).get()
+    return end - size, end
+
+
+def reserve_block(name, size):
+    """Reserve ``size`` numbers for ``name`` in an independent transaction."""
+    connection = connections[router.db_for_write(IdentifierSequence)]
+    if connection.vendor == "sqlite":
+        return _reserve_block(name, size)
+
+    result = {}
+
+    def run():
+        try:
+            result["block"] = _reserve_block(name, size)
+        except Exception as exc:  # re-raised in the calling thread
+            result["error"] = exc
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run, name=f"reserve-{name}")
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["block"]
+
+
+class _UncommittedBlock:
+    """Tracks a block reserved inline inside the caller's (SQLite) transaction."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.committed = False
+        transaction.on_commit(self._commit, using=connection.alias)
+
+    def _commit(self):
+        self.committed = True
+
+    def rolled_back(self):
+        # Django drops the callbacks of a transaction or savepoint that rolls
+        # back without running them; there is no public rollback hook.
+        pending = [func for _sids, func, _robust in self.connection.run_on_commit]
+        return not self.committed and self._commit not in pending
+
+
+class BlockAllocator:
+    def __init__(self, name, block_size=None):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = self._end = 0
+        self._uncommitted = None
+
+    def next_value(self):
+        with self._lock:
+            if self._uncommitted is not None and self._uncommitted.rolled_back():
+                self._next = self._end = 0
+            # A forked worker must not keep using its parent's block.
+            if self._next >= self._end or self._pid != os.getpid():
+                size = self.block_size or settings.ORDER_ID_BLOCK_SIZE
+                self._next, self._end = reserve_block(self.name, size)
+                self._pid = os.getpid()
+                connection = connections[router.db_for_write(IdentifierSequence)]
+                inline = connection.vendor == "sqlite" and connection.in_atomic_block
+                self._uncommitted = _UncommittedBlock(connection) if inline else None
+            value = self._next
+            self._next += 1
+            return value
+
+
+awb_allocator = BlockAllocator("orders.awb")
+order_code_allocator = BlockAllocator("orders.order_code")
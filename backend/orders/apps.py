@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _repair_search_index(sender, using, **kwargs):
+    from django.db import connections
+
+    from .search import repair_sqlite_triggers
+
+    repair_sqlite_triggers(connections[using])
 
 
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(_repair_search_index, sender=self)
@@ -0,0 +1,83 @@
+"""Moving finished orders out of the live tables.
+
+Completed and cancelled orders that have not changed for a while are
+copied into ``ArchivedOrder`` (the rendered detail plus every column of the
+order, its items and its tracking events) and deleted from the live tables,
+one batch per transaction. Orders still referenced by a COD ledger entry, a
+shipment or a proof of delivery stay live: deleting them would cascade into
+those records.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from billing.models import CODLedger
+from shipments.models import OrderShipment, ProofOfDelivery
+from tracking.models import TrackingEvent
+from .models import ArchivedOrder, Order, OrderItem
+from .serializers import OrderSerializer
+
+ARCHIVABLE_STATUSES = (Order.OrderStatus.COMPLETED, Order.OrderStatus.CANCELLED)
+
+
+def finished_orders(cutoff):
+    """Completed/cancelled orders last updated before ``cutoff``."""
+    return Order.objects.filter(order_status__in=ARCHIVABLE_STATUSES, updated_at__lt=cutoff)
+
+
+def archivable_orders(cutoff):
+    # Subqueries rather than reverse joins: FOR UPDATE cannot lock the
+    # nullable side of an outer join.
+    dependents = (CODLedger, OrderShipment, ProofOfDelivery)
+    queryset = finished_orders(cutoff)
+    for model in dependents:
+        queryset = queryset.exclude(Exists(model.objects.filter(order=OuterRef("pk"))))
+    return queryset
+
+
+def _grouped(model, order_pks):
+    rows = defaultdict(list)
+    for row in model.objects.filter(order_id__in=order_pks).order_by("pk").values():
+        rows[row["order_id"]].append(row)
+    return rows
+
+
+def archive_orders(order_pks, cutoff):
+    """Archive the orders among ``order_pks`` that are still archivable.
+
+    Returns the number of orders archived.
+    """
+    with transaction.atomic():
+        orders = list(
+            archivable_orders(cutoff)
+            .filter(pk__in=order_pks)
+            .select_for_update()
+            .prefetch_related("items")
+        )
+        if not orders:
+            return 0
+        pks = [order.pk for order in orders]
+        columns = {row["id"]: row for row in Order.objects.filter(pk__in=pks).values()}
+        items = _grouped(OrderItem, pks)
+        events = _grouped(TrackingEvent, pks)
+
+        ArchivedOrder.objects.bulk_create(
+            ArchivedOrder(
+                order_id=order.order_id,
+                order_code=order.order_code,
+                awb=order.awb,
+                merchant_id=order.merchant_id,
+                order_status=order.order_status,
+                created_at=order.created_at,
+                detail=OrderSerializer(order).data,
+                record={
+                    "order": columns[order.pk],
+                    "items": items[order.pk],
+                    "events": events[order.pk],
+                },
+            )
+            for order in orders
+        )
+        Order.objects.filter(pk__in=pks).delete()
+    return len(orders)
@@ -0,0 +1,80 @@
+"""Native async read views for the ASGI deployment.
+
+These mirror ``OrderListView`` and ``OrderDetailView`` but run on the event
+loop with the async ORM, so a single worker can serve many concurrent
+requests without a thread per request.
+"""
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.decorators import method_decorator
+from rest_framework.exceptions import NotFound
+
+from accounts.authentication import AsyncJWTView
+from exbuy_core.db_router import read_from_replica
+from exbuy_core.pagination import encode_keyset_cursor, keyset_filter
+from .cache import aget_detail, aset_detail, can_view
+from .filters import OrderFilter
+from .models import ArchivedOrder, Order
+from .serializers import OrderSerializer
+
+MAX_PAGE_SIZE = 100
+
+
+@method_decorator(read_from_replica, name="get")
+class AsyncOrderListView(AsyncJWTView):
+    async def get(self, request):
+        queryset = Order.objects.visible_to(request.user).prefetch_related("items")
+        filterset = OrderFilter(request.GET, queryset=queryset)
+        if not filterset.is_valid():
+            return JsonResponse(filterset.errors, status=400)
+        queryset = filterset.qs.order_by("-created_at", "-id")
+
+        try:
+            page_size = int(request.GET.get("page_size", settings.REST_FRAMEWORK["PAGE_SIZE"]))
+        except ValueError:
+            page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        cursor = request.GET.get("cursor")
+        if cursor:
+            try:
+                queryset = keyset_filter(queryset, cursor)
+            except NotFound as exc:
+                # Same response as KeysetPagination on the DRF list view.
+                return JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+
+        orders = [order async for order in queryset[: page_size + 1].aiterator(chunk_size=page_size + 1)]
+        next_cursor = None
+        if len(orders) > page_size:
+            orders = orders[:page_size]
+            next_cursor = encode_keyset_cursor(orders[-1].created_at, orders[-1].pk)
+
+        return JsonResponse({"next_cursor": next_cursor, "results": OrderSerializer(orders, many=True).data})
+
+
+class AsyncOrderDetailView(AsyncJWTView):
+    async def get(self, request, order_id):
+        entry, version = await aget_detail(order_id)
+        if entry is None:
+            queryset = (
+                Order.objects.visible_to(request.user)
+                .select_related("merchant")
+                .prefetch_related("items")
+            )
+            try:
+                order = await queryset.aget(order_id=order_id)
+            except Order.DoesNotExist:
+                archived = ArchivedOrder.objects.visible_to(request.user).select_related("merchant")
+                try:
+                    order = await archived.aget(order_id=order_id)
+                except ArchivedOrder.DoesNotExist:
+                    return JsonResponse({"detail": "No Order matches the given query."}, status=404)
+            entry = await aset_detail(order, version)
+        elif not can_view(request.user, entry):
+            return JsonResponse({"detail": "No Order matches the given query."}, status=404)
+
+        if request.headers.get("If-None-Match") == entry["etag"]:
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse(entry["data"])
+        response["ETag"] = entry["etag"]
+        return response
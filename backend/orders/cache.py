@@ -0,0 +1,105 @@
+"""Cached order detail payloads.
+
+Clients poll ``/api/orders/<order_id>/`` for status changes, so the serialized
+order is cached with a weak ETag and polls with a matching ``If-None-Match``
+get a 304 without touching the database.
+
+Invalidation is exact: every change to an order, its items or its tracking
+events bumps a per-order version (after the transaction commits) and entries
+are only served if they were built at the current version. Bumping the
+version rather than only deleting the entry means a reader that loaded the
+order before the change cannot put the old payload back afterwards.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+
+from accounts.models import User
+from .models import ArchivedOrder, sees_all_orders
+from .serializers import OrderSerializer
+
+DETAIL_TIMEOUT = 300
+# Outlives the entries so an evicted version cannot revive an older entry.
+VERSION_TIMEOUT = 60 * 60 * 24
+
+
+def detail_cache_key(order_id):
+    return f"order:detail:{order_id}"
+
+
+def _version_key(order_id):
+    return f"order:detail:{order_id}:version"
+
+
+def build_entry(order, version):
+    """Serialize ``order`` (with ``merchant`` loaded) into a cache entry.
+
+    ``order`` may be an ``ArchivedOrder``, which carries its rendered detail.
+    """
+    data = order.detail if isinstance(order, ArchivedOrder) else OrderSerializer(order).data
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+    return {
+        "data": data,
+        "etag": f'W/"{digest}"',
+        "owner_id": order.merchant.owner_id,
+        "version": version,
+    }
+
+
+def _current(values, order_id):
+    """Return ``(entry or None, version)`` from a ``get_many`` result."""
+    version = values.get(_version_key(order_id), 0)
+    entry = values.get(detail_cache_key(order_id))
+    if entry is not None and entry["version"] != version:
+        entry = None
+    return entry, version
+
+
+def get_detail(order_id):
+    values = cache.get_many([detail_cache_key(order_id), _version_key(order_id)])
+    return _current(values, order_id)
+
+
+async def aget_detail(order_id):
+    values = await cache.aget_many([detail_cache_key(order_id), _version_key(order_id)])
+    return _current(values, order_id)
+
+
+def set_detail(order, version):
+    entry = build_entry(order, version)
+    cache.set(detail_cache_key(order.order_id), entry, DETAIL_TIMEOUT)
+    return entry
+
+
+async def aset_detail(order, version):
+    entry = build_entry(order, version)
+    await cache.aset(detail_cache_key(order.order_id), entry, DETAIL_TIMEOUT)
+    return entry
+
+
+def can_view(user, entry):
+    if sees_all_orders(user):
+        return True
+    return user.role == User.Role.MERCHANT and entry["owner_id"] == user.pk
+
+
+def _bump(order_ids):
+    for order_id in order_ids:
+        key = _version_key(order_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, VERSION_TIMEOUT):
+                cache.incr(key)
+        else:
+            cache.touch(key, VERSION_TIMEOUT)
+    cache.delete_many([detail_cache_key(order_id) for order_id in order_ids])
+
+
+def invalidate_details(order_ids, using=None):
+    """Invalidate the cached details of ``order_ids`` once the transaction commits."""
+    order_ids = list(order_ids)
+    if order_ids:
+        transaction.on_commit(lambda: _bump(order_ids), using=using)
@@ -0,0 +1,83 @@
+"""Decryption of client-encrypted order payloads.
+
+Two wire formats are accepted:
+
+* legacy: ``{"payload": b64(RSA-OAEP-SHA256(order_json))}``; limited to
+  about 190 bytes of JSON with a 2048-bit key.
+* envelope: ``{"kid": ..., "ek": b64(RSA-OAEP-SHA256(aes_key)),
+  "iv": b64(nonce), "payload": b64(AES-256-GCM(order_json) || tag)}``;
+  RSA only unwraps the 32-byte content key, so payload size is unbounded.
+
+Parsed private keys are cached per process, keyed by their PEM text, so a
+rotated key is parsed once and the old one keeps working for as long as it
+stays configured under its key ID.
+"""
+import base64
+import binascii
+import json
+from functools import lru_cache
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.conf import settings
+
+ENVELOPE_ALGORITHM = "RSA-OAEP-256+A256GCM"
+
+_OAEP = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+
+
+class KeyNotConfigured(Exception):
+    """No private key is configured for the requested key ID."""
+
+
+class InvalidPayload(Exception):
+    """The payload could not be decoded, decrypted or parsed."""
+
+
+def configured_keys():
+    keys = dict(settings.ORDER_PAYLOAD_PRIVATE_KEYS)
+    if settings.ORDER_PAYLOAD_PRIVATE_KEY:
+        keys.setdefault(settings.ORDER_PAYLOAD_KEY_ID, settings.ORDER_PAYLOAD_PRIVATE_KEY)
+    return keys
+
+
+@lru_cache(maxsize=8)
+def _load_private_key(private_key_pem):
+    return serialization.load_pem_private_key(private_key_pem.encode("utf-8"), password=None)
+
+
+def get_private_key(kid=None):
+    private_key_pem = configured_keys().get(kid or settings.ORDER_PAYLOAD_KEY_ID)
+    if not private_key_pem:
+        raise KeyNotConfigured(kid or settings.ORDER_PAYLOAD_KEY_ID)
+    return _load_private_key(private_key_pem)
+
+
+def _b64decode(value, field):
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise InvalidPayload(f"{field} is not valid base64.") from exc
+
+
+def decrypt_order_payload(data):
+    """Return the decrypted order dict for a legacy or envelope payload."""
+    private_key = get_private_key(data.get("kid"))
+    ciphertext = _b64decode(data.get("payload"), "payload")
+
+    try:
+        if "ek" in data:
+            alg = data.get("alg", ENVELOPE_ALGORITHM)
+            if alg != ENVELOPE_ALGORITHM:
+                raise InvalidPayload(f"Unsupported algorithm {alg!r}.")
+            content_key = private_key.decrypt(_b64decode(data["ek"], "ek"), _OAEP)
+            nonce = _b64decode(data.get("iv"), "iv")
+            plaintext = AESGCM(content_key).decrypt(nonce, ciphertext, None)
+        else:
+            plaintext = private_key.decrypt(ciphertext, _OAEP)
+        return json.loads(plaintext.decode("utf-8"))
+    except (ValueError, InvalidTag) as exc:
+        # json.JSONDecodeError and UnicodeDecodeError are ValueErrors too.
+        raise InvalidPayload(str(exc) or "Decryption failed.") from exc
@@ -0,0 +1,102 @@
+"""Streaming order exports (CSV and NDJSON).
+
+Orders are read with a server-side cursor in chunks of ``EXPORT_CHUNK_SIZE``;
+the items of each chunk are prefetched with one extra query. Nothing is
+accumulated between chunks, so memory use does not depend on export size.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .models import OrderItem
+
+EXPORT_CHUNK_SIZE = 2000
+
+ORDER_COLUMNS = (
+    "order_id",
+    "order_code",
+    "merchant_id",
+    "customer_name",
+    "order_status",
+    "payment_status",
+    "payment_method",
+    "address",
+    "city",
+    "postal_code",
+    "ship_to_country",
+    "total",
+    "created_at",
+)
+ITEM_COLUMNS = ("name", "price", "qty", "product_no", "category", "weight")
+
+CSV_HEADER = ORDER_COLUMNS + tuple(f"item_{column}" for column in ITEM_COLUMNS)
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(queryset):
+    return queryset.prefetch_related(
+        Prefetch("items", queryset=OrderItem.objects.order_by("id").only("order_id", *ITEM_COLUMNS))
+    ).order_by("id")
+
+
+def _order_values(order):
+    values = [getattr(order, column) for column in ORDER_COLUMNS]
+    values[ORDER_COLUMNS.index("created_at")] = order.created_at.isoformat()
+    return values
+
+
+def _csv_lines(order, writer):
+    values = _order_values(order)
+    items = order.items.all()
+    if not items:
+        yield writer.writerow(values + [""] * len(ITEM_COLUMNS))
+    for item in items:
+        yield writer.writerow(values + [getattr(item, column) for column in ITEM_COLUMNS])
+
+
+def _ndjson_line(order):
+    record = dict(zip(ORDER_COLUMNS, _order_values(order)))
+    record["items"] = [{column: getattr(item, column) for column in ITEM_COLUMNS} for item in order.items.all()]
+    return json.dumps(record, cls=DjangoJSONEncoder) + "\n"
+
+
+def stream_export(queryset, export_format):
+    """Yield the export line by line from a synchronous cursor (WSGI)."""
+    writer = csv.writer(_Echo())
+    if export_format == "csv":
+        yield writer.writerow(CSV_HEADER)
+    for order in export_queryset(queryset).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        if export_format == "csv":
+            yield from _csv_lines(order, writer)
+        else:
+            yield _ndjson_line(order)
+
+
+async def astream_export(queryset, export_format):
+    """Async twin of :func:`stream_export`.
+
+    Under ASGI Django buffers synchronous iterators of a streaming response
+    into a list before sending them, which would defeat streaming.
+    """
+    writer = csv.writer(_Echo())
+    if export_format == "csv":
+        yield writer.writerow(CSV_HEADER)
+    async for order in export_queryset(queryset).aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        if export_format == "csv":
+            for line in _csv_lines(order, writer):
+                yield line
+        else:
+            yield _ndjson_line(order)
@@ -0,0 +1,20 @@
+import django_filters
+
+from .models import Order
+from .search import MIN_QUERY_LENGTH, matching_orders
+
+
+class OrderFilter(django_filters.FilterSet):
+    # A plain id filter: validating it needs no merchant lookup, which also
+    # keeps the filterset usable from async views.
+    merchant = django_filters.NumberFilter(field_name="merchant_id")
+    created_after = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="gte")
+    created_before = django_filters.IsoDateTimeFilter(field_name="created_at", lookup_expr="lt")
+    search = django_filters.CharFilter(method="filter_search", min_length=MIN_QUERY_LENGTH)
+
+    class Meta:
+        model = Order
+        fields = ["merchant", "order_status", "payment_status"]
+
+    def filter_search(self, queryset, name, value):
+        return matching_orders(queryset, value)
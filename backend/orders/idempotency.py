@@ -0,0 +1,84 @@
+"""Idempotency-Key handling for order creation endpoints.
+
+The first request for a key reserves it atomically with ``cache.add`` and
+stores an in-flight marker with a hash of the request body. Concurrent
+duplicates wait briefly for the final response and replay it; if it does
+not arrive in time they get a 409 so the client backs off instead of
+creating another order. Failed requests release the key so they can be
+retried.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_TTL = 600
+IN_FLIGHT_TTL = 30
+WAIT_TIMEOUT = 2.0
+POLL_INTERVAL = 0.05
+
+IN_FLIGHT = "in_flight"
+COMPLETED = "completed"
+
+
+def _cache_key(request, scope, key):
+    return f"idempotency:{scope}:{request.user.pk}:{key}"
+
+
+def _replay(record):
+    response = Response(record["data"], status=record["status"])
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def run_idempotent(request, handler, scope="orders"):
+    """Call ``handler()`` at most once per ``Idempotency-Key`` header value."""
+    key = request.headers.get("Idempotency-Key", "").strip()
+    if not key:
+        return handler()
+
+    cache_key = _cache_key(request, scope, key)
+    fingerprint = hashlib.sha256(request.body).hexdigest()
+    deadline = time.monotonic() + WAIT_TIMEOUT
+
+    while not cache.add(cache_key, {"state": IN_FLIGHT, "fingerprint": fingerprint}, IN_FLIGHT_TTL):
+        record = cache.get(cache_key)
+        if record is None:
+            # The holder released the key between add() and get(); try again.
+            continue
+        if record["fingerprint"] != fingerprint:
+            return Response(
+                {"detail": "Idempotency-Key was already used with a different request body."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if record["state"] == COMPLETED:
+            return _replay(record)
+        if time.monotonic() >= deadline:
+            return Response(
+                {"detail": "A request with this Idempotency-Key is still being processed."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        time.sleep(POLL_INTERVAL)
+
+    try:
+        response = handler()
+    except Exception:
+        cache.delete(cache_key)
+        raise
+
+    if status.is_success(response.status_code):
+        cache.set(
+            cache_key,
+            {
+                "state": COMPLETED,
+                "fingerprint": fingerprint,
+                "status": response.status_code,
+                "data": response.data,
+            },
+            IDEMPOTENCY_TTL,
+        )
+    else:
+        cache.delete(cache_key)
+    return response
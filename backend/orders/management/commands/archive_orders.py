@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.archive import archivable_orders, archive_orders, finished_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed/cancelled orders not updated for --days days, with their "
+        "items and tracking events, to the ArchivedOrder table in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=180)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Only count the orders to archive.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        candidates = archivable_orders(cutoff)
+        blocked = finished_orders(cutoff).count() - candidates.count()
+        if blocked:
+            self.stdout.write(f"Skipping {blocked} orders referenced by COD ledger, shipment or POD records.")
+
+        if options["dry_run"]:
+            self.stdout.write(f"{candidates.count()} orders would be archived.")
+            return
+
+        archived, last_pk = 0, 0
+        while True:
+            batch = list(
+                candidates.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            archived += archive_orders(batch, cutoff)
+            last_pk = batch[-1]
+            self.stdout.write(f"Archived {archived} orders...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} orders."))
@@ -0,0 +1,77 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import User
+from merchants.models import Merchant
+from orders.models import Order, OrderItem
+from orders.serializers import OrderSerializer, OrderValuesSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare OrderSerializer with the OrderValuesSerializer fast path on a "
+        "page of generated orders. The data is created in a transaction that "
+        "is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=100, help="Orders per page.")
+        parser.add_argument("--items", type=int, default=3, help="Items per order.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per serializer.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options["orders"], options["items"], options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, order_count, item_count, repeat):
+        owner = User.objects.create_user(
+            email="benchmark-order-serializers@example.invalid", password=None, role="merchant"
+        )
+        merchant = Merchant.objects.create(owner=owner, company_name="Benchmark")
+        orders = Order.objects.bulk_create(
+            Order(merchant=merchant, customer_name=f"Customer {i}", total=Decimal("1499.50"))
+            for i in range(order_count)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(order=order, name=f"Item {j}", price=Decimal("499.83"), qty=j + 1)
+            for order in orders
+            for j in range(item_count)
+        )
+        queryset = Order.objects.filter(merchant=merchant).order_by("-created_at", "-id")
+
+        def regular():
+            return OrderSerializer(queryset.prefetch_related("items"), many=True).data
+
+        def fast():
+            serializer = OrderValuesSerializer()
+            return serializer.serialize(serializer.order_values(queryset))
+
+        if regular() != fast():
+            self.stderr.write(self.style.ERROR("Outputs differ."))
+            return
+
+        timings = {}
+        for name, func in (("OrderSerializer", regular), ("OrderValuesSerializer", fast)):
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                runs.append(time.perf_counter() - start)
+            timings[name] = min(runs)
+            self.stdout.write(f"{name:<24} best of {repeat}: {timings[name] * 1000:8.1f} ms")
+
+        speedup = timings["OrderSerializer"] / timings["OrderValuesSerializer"]
+        self.stdout.write(self.style.SUCCESS(
+            f"{order_count} orders x {item_count} items: {speedup:.1f}x faster"
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from orders.models import Order
+from orders.totals import recompute_totals
+
+
+class Command(BaseCommand):
+    help = "Recompute Order.total, item_count and weight_kg from the order items, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated, last_pk = 0, 0
+        while True:
+            batch = list(
+                Order.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[: options["batch_size"]]
+            )
+            if not batch:
+                break
+            updated += recompute_totals(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f"Recomputed {updated} orders...")
+
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {updated} orders."))
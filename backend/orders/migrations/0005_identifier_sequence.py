@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+import orders.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("orders", "0004_order_merchant_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdentifierSequence",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("next_value", models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="order",
+            name="awb",
+            field=models.CharField(default=orders.models.next_awb, max_length=20, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="order",
+            name="order_code",
+            field=models.CharField(
+                default=orders.models.next_order_code,
+                editable=False,
+                help_text="Human friendly order code",
+                max_length=16,
+                unique=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from orders.search import install_search_index
+
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from orders.search import uninstall_search_index
+
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    # Backend-specific search columns/tables live outside the model state;
+    # see orders/search.py.
+    dependencies = [
+        ("orders", "0005_identifier_sequence"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,36 @@
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("merchants", "0001_initial"),
+        ("orders", "0006_order_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedOrder",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("order_id", models.UUIDField(unique=True)),
+                ("order_code", models.CharField(max_length=16, unique=True)),
+                ("awb", models.CharField(db_index=True, max_length=20)),
+                ("order_status", models.CharField(max_length=20)),
+                ("created_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("detail", models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ("record", models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                (
+                    "merchant",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="merchants.merchant"),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["merchant", "-created_at"], name="archived_merchant_created_idx"),
+                ],
+            },
+        ),
+    ]
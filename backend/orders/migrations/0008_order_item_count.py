@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Existing orders get their totals from ``manage.py recompute_order_totals``.
+    dependencies = [
+        ("orders", "0007_archived_order"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
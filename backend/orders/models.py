@@ -1,15 +1,57 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 import uuid
 
+from accounts.models import User
 from merchants.models import Merchant
 
 
 def generate_order_code():
+    # Random legacy codes; still referenced by migration 0002.
     return f"EX{uuid.uuid4().hex[:10].upper()}"
 
 
+def next_order_code():
+    from .allocator import order_code_allocator
+
+    # The "EXN" prefix and length keep these apart from the random legacy codes.
+    return f"EXN{order_code_allocator.next_value():010d}"
+
+
+def next_awb():
+    from .allocator import awb_allocator
+
+    return f"EXB{awb_allocator.next_value():012d}"
+
+
+class IdentifierSequence(models.Model):
+    """Next free number of a block-allocated identifier (see ``allocator``)."""
+
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+def sees_all_orders(user):
+    return user.is_superuser or user.role in (User.Role.ADMIN, User.Role.OPS)
+
+
+class OrderQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Limit orders to what ``user`` may see based on their role."""
+        if not user or not user.is_authenticated:
+            return self.none()
+        if sees_all_orders(user):
+            return self
+        if user.role == User.Role.MERCHANT:
+            return self.filter(merchant__owner=user)
+        return self.none()
+
+
 class Order(models.Model):
     order_id = models.UUIDField(
         default=uuid.uuid4,
@@ -21,12 +63,12 @@ class Order(models.Model):
     order_code = models.CharField(
         max_length=16,
         unique=True,
-        default=generate_order_code,
+        default=next_order_code,
         editable=False,
         help_text="Human friendly order code",
     )
 
-    awb = models.CharField(max_length=20, unique=True, default="NA")
+    awb = models.CharField(max_length=20, unique=True, default=next_awb)
     receiver_name = models.CharField(max_length=120, default="N/A")
     delivery_address = models.TextField(default="N/A")
     phone = models.CharField(max_length=20, default="N/A")
@@ -107,16 +149,38 @@ class Order(models.Model):
     shipping_company = models.CharField(max_length=120, default="ExBuy Global Shipping")
     shipping_cost = models.CharField(max_length=40, default="0/kg")
 
+    # Derived from the items on the server; see orders/totals.py.
     total = models.DecimalField(
         max_digits=10,
         decimal_places=2,
         validators=[MinValueValidator(0)],
         default=0,
     )
+    item_count = models.PositiveIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the order list walks this index.
+            models.Index(fields=["-created_at", "-id"], name="order_created_id_idx"),
+            # Merchant dashboards: list, filter by status, filter by payment.
+            models.Index(fields=["merchant", "-created_at"], name="order_merchant_created_idx"),
+            models.Index(
+                fields=["merchant", "order_status", "-created_at"],
+                name="order_merchant_status_idx",
+            ),
+            models.Index(
+                fields=["merchant", "payment_status", "-created_at"],
+                name="order_merchant_payment_idx",
+            ),
+            # Ops/admin views filter across merchants.
+            models.Index(fields=["order_status", "-created_at"], name="order_status_created_idx"),
+        ]
+
     def __str__(self):
         return f"Order {self.order_code} - {self.customer_name} [{self.order_status}]"
 
@@ -139,4 +203,32 @@ class OrderItem(models.Model):
         return self.price * self.qty
 
     def __str__(self):
-        return f"{self.name} (x{self.qty}) for Order {self.order.order_code}"
\ No newline at end of file
+        return f"{self.name} (x{self.qty}) for Order {self.order.order_code}"
+
+class ArchivedOrder(models.Model):
+    """A completed or cancelled order moved out of the live tables.
+
+    ``detail`` is the order as ``OrderSerializer`` rendered it, served by the
+    detail endpoints; ``record`` keeps every column of the order, its items
+    and its tracking events. See the ``archive_orders`` command.
+    """
+
+    order_id = models.UUIDField(unique=True)
+    order_code = models.CharField(max_length=16, unique=True)
+    awb = models.CharField(max_length=20, db_index=True)
+    merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE)
+    order_status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    detail = models.JSONField(encoder=DjangoJSONEncoder)
+    record = models.JSONField(encoder=DjangoJSONEncoder)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["merchant", "-created_at"], name="archived_merchant_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Archived order {self.order_code} [{self.order_status}]"
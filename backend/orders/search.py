@@ -0,0 +1,204 @@
+"""Indexed order search.
+
+Support staff look orders up by fragments of a phone number, AWB, order code,
+receiver/customer name or address. Plain ``icontains`` over those columns is a
+sequential scan, so each backend gets a real index instead:
+
+* PostgreSQL: ``search_document`` (the searchable columns joined together) and
+  ``search_vector`` (its ``tsvector``) are stored generated columns with GIN
+  indexes - trigram on the document for substring/fuzzy matches, full-text on
+  the vector for word matches. Postgres keeps both current on every write.
+* SQLite: ``orders_order_fts`` is an FTS5 external-content table with the
+  trigram tokenizer, kept current by triggers on ``orders_order``.
+
+Any other backend falls back to ``icontains``.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Order
+
+SEARCH_FIELDS = (
+    "order_code",
+    "awb",
+    "receiver_name",
+    "customer_name",
+    "phone",
+    "delivery_address",
+    "address",
+    "city",
+    "postal_code",
+)
+
+# Trigram indexes cannot answer shorter substrings.
+MIN_QUERY_LENGTH = 3
+
+TABLE = Order._meta.db_table
+FTS_TABLE = f"{TABLE}_fts"
+
+_PG_DOCUMENT = " || ' ' || ".join(f"coalesce({field}, '')" for field in SEARCH_FIELDS)
+
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"ALTER TABLE {TABLE} ADD COLUMN search_document text "
+    f"GENERATED ALWAYS AS ({_PG_DOCUMENT}) STORED",
+    f"ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, {_PG_DOCUMENT})) STORED",
+    f"CREATE INDEX order_search_trgm_idx ON {TABLE} USING gin (search_document gin_trgm_ops)",
+    f"CREATE INDEX order_search_vector_idx ON {TABLE} USING gin (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector",
+    f"ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_document",
+]
+
+_COLUMNS = ", ".join(SEARCH_FIELDS)
+_NEW = ", ".join(f"new.{field}" for field in SEARCH_FIELDS)
+_OLD = ", ".join(f"old.{field}" for field in SEARCH_FIELDS)
+
+SQLITE_TRIGGERS = {
+    f"{FTS_TABLE}_ai": (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW}); END"
+    ),
+    f"{FTS_TABLE}_ad": (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD}); END"
+    ),
+    f"{FTS_TABLE}_au": (
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, {_NEW}); END"
+    ),
+}
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_COLUMNS}, content='{TABLE}', content_rowid='id', tokenize='trigram')",
+    *SQLITE_TRIGGERS.values(),
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    *(f"DROP TRIGGER IF EXISTS {name}" for name in SQLITE_TRIGGERS),
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install_search_index(connection):
+    if connection.vendor == "postgresql":
+        _execute(connection, POSTGRES_INSTALL)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_INSTALL)
+
+
+def uninstall_search_index(connection):
+    if connection.vendor == "postgresql":
+        _execute(connection, POSTGRES_UNINSTALL)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_UNINSTALL)
+
+
+def repair_sqlite_triggers(connection):
+    """Re-create FTS triggers dropped by a SQLite table rebuild.
+
+    SQLite migrations that alter ``orders_order`` copy it into a new table,
+    which silently drops its triggers; run after every ``migrate``.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master WHERE name = %s OR type = 'trigger'",
+            [FTS_TABLE],
+        )
+        existing = {name for _type, name in cursor.fetchall()}
+        if FTS_TABLE not in existing or existing.issuperset(SQLITE_TRIGGERS):
+            return
+        for name, statement in SQLITE_TRIGGERS.items():
+            if name not in existing:
+                cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _like_pattern(query):
+    return "%" + re.sub(r"([\\%_])", r"\\\1", query) + "%"
+
+
+def _fts_query(query):
+    # Each term becomes a quoted trigram phrase (substring match); terms too
+    # short for the trigram tokenizer are dropped.
+    terms = [term for term in query.split() if len(term) >= MIN_QUERY_LENGTH]
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _expressions(queryset, query):
+    """Return the ``(match, rank)`` expressions for ``query``, or ``None``."""
+    query = query.strip()
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        match = RawSQL(
+            f"{TABLE}.search_vector @@ websearch_to_tsquery('simple', %s) "
+            f"OR {TABLE}.search_document ILIKE %s",
+            (query, _like_pattern(query)),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"ts_rank({TABLE}.search_vector, websearch_to_tsquery('simple', %s)) "
+            f"+ word_similarity(%s, {TABLE}.search_document)",
+            (query, query),
+            output_field=FloatField(),
+        )
+    elif vendor == "sqlite":
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return None
+        match = RawSQL(
+            f"{TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+            (fts_query,),
+            output_field=BooleanField(),
+        )
+        # bm25() is lower-is-better; negate it so both backends sort descending.
+        rank = RawSQL(
+            f"(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id)",
+            (fts_query,),
+            output_field=FloatField(),
+        )
+    else:
+        match = Q()
+        for field in SEARCH_FIELDS:
+            match |= Q(**{f"{field}__icontains": query})
+        rank = Value(0.0, output_field=FloatField())
+    return match, rank
+
+
+def matching_orders(queryset, query):
+    """Filter ``queryset`` to orders matching ``query``, keeping its ordering."""
+    expressions = _expressions(queryset, query)
+    if expressions is None:
+        return queryset.none()
+    return queryset.filter(expressions[0])
+
+
+def search_orders(queryset, query):
+    """Filter ``queryset`` to orders matching ``query``, best matches first.
+
+    Each row is annotated with ``search_rank`` (higher is better).
+    """
+    expressions = _expressions(queryset, query)
+    if expressions is None:
+        return queryset.none()
+    match, rank = expressions
+    return queryset.filter(match).annotate(search_rank=rank).order_by("-search_rank", "-created_at")
@@ -1,5 +1,13 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
+
+from catalog.inventory import OutOfStock, reserve_order
+from merchants.models import Merchant
 from .models import Order, OrderItem
+from .totals import compute_totals, totals_error
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -37,14 +45,182 @@ class OrderSerializer(serializers.ModelSerializer):
             "shipping_company",
             "shipping_cost",
             "total",
+            "item_count",
+            "weight_kg",
             "created_at",
             "items",
         ]
-        read_only_fields = ["order_id", "order_code", "created_at"]
+        read_only_fields = ["order_id", "order_code", "total", "item_count", "weight_kg", "created_at"]
+
+    def validate(self, attrs):
+        # The totals are derived from the items, so their limits are checked here.
+        error = totals_error(compute_totals(attrs.get("items", [])))
+        if error:
+            raise serializers.ValidationError({"items": [error]})
+        return attrs
 
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
-        order = Order.objects.create(**validated_data)
-        for item in items_data:
-            OrderItem.objects.create(order=order, **item)
-        return order
\ No newline at end of file
+        validated_data.update(compute_totals(items_data))
+        with transaction.atomic():
+            order = Order.objects.create(**validated_data)
+            OrderItem.objects.bulk_create(
+                [OrderItem(order=order, **item) for item in items_data]
+            )
+            try:
+                reserve_order(order, items_data)
+            except OutOfStock as exc:
+                raise serializers.ValidationError({"items": [str(exc)]})
+        return order
+
+
+# Fields whose to_representation() is a no-op on values the database returns.
+_PASSTHROUGH_FIELDS = (serializers.CharField, serializers.IntegerField)
+
+
+def _value_fields(serializer):
+    """``(name, source, convert)`` per field; ``source`` is None for nested lists."""
+    fields = []
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.BaseSerializer):
+            fields.append((name, None, None))
+        elif type(field) in _PASSTHROUGH_FIELDS:
+            fields.append((name, field.source, None))
+        else:
+            fields.append((name, field.source, field.to_representation))
+    return fields
+
+
+def _render(fields, values, nested=None):
+    data = {}
+    for (name, source, convert), value in zip(fields, values):
+        if source is None:
+            data[name] = nested
+        elif value is None or convert is None:
+            data[name] = value
+        else:
+            data[name] = convert(value)
+    return data
+
+
+class OrderValuesSerializer:
+    """Read-only fast path producing exactly ``OrderSerializer(many=True).data``.
+
+    Orders and their items are read as plain ``values()`` rows in two queries
+    and grouped in Python, skipping per-instance serializer work. Fields are
+    taken from ``OrderSerializer`` itself, and values that need converting
+    (UUIDs, decimals, datetimes) go through its field instances, so the two
+    cannot drift apart.
+    """
+
+    def __init__(self):
+        serializer = OrderSerializer()
+        self.order_fields = _value_fields(serializer)
+        self.item_fields = _value_fields(serializer.fields["items"].child)
+
+    def order_values(self, queryset):
+        """``queryset`` as the dict rows :meth:`serialize` expects."""
+        sources = [source for _name, source, _convert in self.order_fields if source]
+        return queryset.prefetch_related(None).values("id", *sources)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        items = defaultdict(list)
+        if rows:
+            item_sources = [source for _name, source, _convert in self.item_fields]
+            item_rows = (
+                OrderItem.objects.filter(order_id__in=[row["id"] for row in rows])
+                .order_by("id")
+                .values_list("order_id", *item_sources)
+            )
+            for order_pk, *values in item_rows:
+                items[order_pk].append(_render(self.item_fields, values))
+
+        return [
+            _render(
+                self.order_fields,
+                [row[source] if source else None for _name, source, _convert in self.order_fields],
+                nested=items[row["id"]],
+            )
+            for row in rows
+        ]
+
+
+class OrderBulkCreateSerializer(serializers.Serializer):
+    """Validate a batch of orders for one merchant and insert them in bulk.
+
+    Each entry of ``orders`` is validated with ``OrderSerializer`` on its own so
+    a bad row is reported by index instead of failing the whole batch. Orders
+    whose stock cannot be reserved are reported the same way by :meth:`create`.
+    """
+
+    merchant = serializers.PrimaryKeyRelatedField(queryset=Merchant.objects.all())
+    orders = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.ORDER_BULK_MAX_BATCH,
+    )
+
+    def validate_merchant(self, merchant):
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        if user is not None and user.role == user.Role.MERCHANT and merchant.owner_id != user.pk:
+            raise serializers.ValidationError("You can only create orders for your own merchant.")
+        return merchant
+
+    def validate(self, attrs):
+        valid, errors = [], []
+        for index, order_data in enumerate(attrs["orders"]):
+            serializer = OrderSerializer(data=order_data)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({"index": index, "errors": serializer.errors})
+        attrs["valid_orders"] = valid
+        attrs["errors"] = errors
+        return attrs
+
+    def create(self, validated_data):
+        merchant = validated_data["merchant"]
+        orders, items, to_reserve = [], [], []
+        for index, order_data in validated_data["valid_orders"]:
+            order_data = dict(order_data)
+            items_data = order_data.pop("items", [])
+            order = Order(merchant=merchant, **order_data, **compute_totals(items_data))
+            orders.append(order)
+            items.extend(OrderItem(order=order, **item) for item in items_data)
+            to_reserve.append((index, order, items_data))
+
+        short = set()
+        with transaction.atomic():
+            Order.objects.bulk_create(orders, batch_size=settings.ORDER_BULK_MAX_BATCH)
+            # bulk_create sets the primary keys on the instances, so the items
+            # can reference their orders without another lookup.
+            OrderItem.objects.bulk_create(items, batch_size=1000)
+            for index, order, items_data in to_reserve:
+                try:
+                    # A savepoint per order: a short one is reported, the rest are kept.
+                    with transaction.atomic():
+                        reserve_order(order, items_data)
+                except OutOfStock as exc:
+                    short.add(order.pk)
+                    validated_data["errors"].append({"index": index, "errors": {"items": [str(exc)]}})
+            if short:
+                Order.objects.filter(pk__in=short).delete()
+        validated_data["errors"].sort(key=lambda error: error["index"])
+
+        return [
+            {"index": index, "order_id": str(order.order_id), "order_code": order.order_code}
+            for index, order, _items_data in to_reserve
+            if order.pk not in short
+        ]
+
+
+class OrderStatusTransitionSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=5000,
+    )
+    status = serializers.ChoiceField(choices=Order.OrderStatus.choices)
+    note = serializers.CharField(max_length=200, required=False, allow_blank=True, default="")
@@ -0,0 +1,31 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tracking.models import TrackingEvent
+from .cache import invalidate_details
+from .models import Order, OrderItem
+
+
+def _order_uuid(instance, using):
+    # Children usually carry their order already; otherwise look up just the UUID.
+    if type(instance).order.is_cached(instance):
+        return instance.order.order_id
+    return Order.objects.using(using).filter(pk=instance.order_id).values_list("order_id", flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_order_detail(sender, instance, using, **kwargs):
+    invalidate_details([instance.order_id], using=using)
+
+
+@receiver([post_save, post_delete], sender=OrderItem)
+@receiver([post_save, post_delete], sender=TrackingEvent)
+def invalidate_parent_order_detail(sender, instance, using, **kwargs):
+    origin = kwargs.get("origin")
+    if isinstance(origin, Order) or (isinstance(origin, QuerySet) and origin.model is Order):
+        # Cascade from deleting the order itself, which invalidates it.
+        return
+    order_id = _order_uuid(instance, using)
+    if order_id is not None:
+        invalidate_details([order_id], using=using)
@@ -1,3 +1,101 @@
+import json
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from catalog.models import Product
+from merchants.models import Merchant
+from .models import Order, OrderItem
+from .serializers import OrderSerializer, OrderValuesSerializer
+
+
+class OrderValuesSerializerContractTests(TestCase):
+    """The fast list path must render exactly what OrderSerializer renders."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="ops@example.com", password="pw", role="ops")
+        owner = User.objects.create_user(email="shop@example.com", password="pw", role="merchant")
+        merchant = Merchant.objects.create(owner=owner, company_name="Shop")
+
+        with_items = Order.objects.create(
+            merchant=merchant,
+            customer_name="Rahim",
+            total=Decimal("1234.5"),
+            order_status=Order.OrderStatus.PURCHASED,
+        )
+        OrderItem.objects.create(order=with_items, name="Shoes", price=Decimal("999.9"), qty=1)
+        OrderItem.objects.create(
+            order=with_items,
+            name="Socks",
+            price=Decimal("0.05"),
+            qty=12,
+            product_no="SKU-1",
+            weight="0.2kg",
+        )
+        Order.objects.create(merchant=merchant, customer_name="Karim", total=Decimal("0"))
+
+    def test_output_matches_order_serializer(self):
+        queryset = Order.objects.order_by("-created_at", "-id")
+        expected = OrderSerializer(queryset.prefetch_related("items"), many=True).data
+
+        fast = OrderValuesSerializer()
+        actual = fast.serialize(fast.order_values(queryset))
+
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    def test_list_endpoint_uses_identical_shape(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/orders/", secure=True)
+
+        expected = OrderSerializer(
+            Order.objects.order_by("-created_at", "-id").prefetch_related("items"), many=True
+        ).data
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.dumps(response.json()["results"]), json.dumps(expected))
+
+
+class OrderCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="shop@example.com", password="pw", role="merchant")
+        cls.merchant = Merchant.objects.create(owner=cls.owner, company_name="Shop")
+
+    def test_items_without_product_no_are_not_stock_tracked(self):
+        serializer = OrderSerializer(data={"items": [{"name": "Gift wrap", "price": "1", "qty": 1}]})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        order = serializer.save(merchant=self.merchant)
+
+        self.assertEqual(order.items.count(), 1)
+        self.assertFalse(order.stock_reservations.exists())
+
+    def test_total_beyond_the_column_is_rejected(self):
+        item = {"name": "Gold", "price": "99999999.99", "qty": 2}
+        serializer = OrderSerializer(data={"items": [item]})
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("items", serializer.errors)
+
+    def test_bulk_create_reports_orders_out_of_stock_and_keeps_the_rest(self):
+        product = Product.objects.create(slug="mug", name="Mug", price=Decimal("5"), stock_qty=1)
+        item = {"name": "Mug", "price": "5", "qty": 1, "product_no": "mug"}
+        client = APIClient()
+        client.force_authenticate(self.owner)
+
+        response = client.post(
+            "/api/orders/place/bulk/",
+            {"merchant": self.merchant.pk, "orders": [{"items": [item]}, {"items": [item]}]},
+            format="json",
+            secure=True,
+        )
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row["index"] for row in response.json()["created"]], [0])
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [1])
+        self.assertEqual(Order.objects.filter(merchant=self.merchant).count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.stock_qty, 0)
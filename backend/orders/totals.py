@@ -0,0 +1,105 @@
+"""Server-side order totals.
+
+``Order.total``, ``Order.item_count`` (units across all items) and
+``Order.weight_kg`` are derived from the order's items and stored on the
+order so lists can show them without loading items. They are computed when
+an order is created and can be recomputed in bulk with
+``recompute_order_totals``.
+"""
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import DecimalField, F, Sum
+
+from .models import Order, OrderItem
+
+CENTS = Decimal("0.01")
+MAX_WEIGHT_KG = Decimal("9999.99")  # Order.weight_kg is max_digits=6
+MAX_TOTAL = Decimal("99999999.99")  # Order.total is max_digits=10
+MAX_ITEM_COUNT = 2147483647  # Order.item_count is a PositiveIntegerField
+
+_WEIGHT_RE = re.compile(r"^\s*(\d+(?:\.\d+)?|\.\d+)\s*(kg|kgs|g|gm|gms|grams?|lbs?)?\s*$", re.IGNORECASE)
+_UNIT_TO_KG = {"g": Decimal("0.001"), "lb": Decimal("0.45359237")}
+
+
+def parse_weight_kg(value):
+    """Parse an item weight such as ``"1.5kg"``, ``"200 g"`` or ``"2"`` (kg).
+
+    Unparseable or empty values count as zero.
+    """
+    match = _WEIGHT_RE.match(value or "")
+    if not match:
+        return Decimal("0")
+    try:
+        amount = Decimal(match.group(1))
+    except InvalidOperation:
+        return Decimal("0")
+    unit = (match.group(2) or "kg").lower()
+    if unit.startswith("lb"):
+        return amount * _UNIT_TO_KG["lb"]
+    if unit.startswith("g"):
+        return amount * _UNIT_TO_KG["g"]
+    return amount
+
+
+def _weight(items):
+    weight = sum((parse_weight_kg(weight) * qty for weight, qty in items), Decimal("0"))
+    return min(weight, MAX_WEIGHT_KG).quantize(CENTS)
+
+
+def compute_totals(items_data):
+    """``total``/``item_count``/``weight_kg`` for validated item dicts."""
+    return {
+        "total": sum((item["price"] * item["qty"] for item in items_data), Decimal("0")).quantize(CENTS),
+        "item_count": sum(item["qty"] for item in items_data),
+        "weight_kg": _weight((item.get("weight", ""), item["qty"]) for item in items_data),
+    }
+
+
+def totals_error(totals):
+    """Why ``totals`` from :func:`compute_totals` cannot be stored, or ``None``."""
+    if totals["total"] > MAX_TOTAL:
+        return f"The order total must not exceed {MAX_TOTAL}."
+    if totals["item_count"] > MAX_ITEM_COUNT:
+        return f"An order must not have more than {MAX_ITEM_COUNT} units."
+    return None
+
+
+def recompute_totals(order_pks):
+    """Recompute and store the totals of ``order_pks``.
+
+    Totals and counts come from one grouped aggregate query; only items that
+    have a weight are fetched to parse it, and orders without any keep their
+    stored weight. Returns the number of orders.
+    """
+    from .cache import invalidate_details  # imports the serializers, which import this module
+
+    order_pks = list(order_pks)
+    sums = {
+        row["order_id"]: row
+        for row in OrderItem.objects.filter(order_id__in=order_pks)
+        .values("order_id")
+        .annotate(
+            total=Sum(F("price") * F("qty"), output_field=DecimalField(max_digits=14, decimal_places=2)),
+            item_count=Sum("qty"),
+        )
+    }
+    weights = defaultdict(list)
+    for order_pk, weight, qty in (
+        OrderItem.objects.filter(order_id__in=order_pks).exclude(weight="").values_list("order_id", "weight", "qty")
+    ):
+        weights[order_pk].append((weight, qty))
+
+    # Loaded rather than built with Order(pk=...), which would draw new
+    # identifiers for the unset order_code/awb defaults.
+    orders = list(Order.objects.filter(pk__in=order_pks).only("order_id", "weight_kg"))
+    for order in orders:
+        row = sums.get(order.pk, {})
+        order.total = Decimal(row.get("total") or 0).quantize(CENTS)
+        order.item_count = row.get("item_count") or 0
+        if order.pk in weights:
+            order.weight_kg = _weight(weights[order.pk])
+    Order.objects.bulk_update(orders, ["total", "item_count", "weight_kg"])
+    invalidate_details(order.order_id for order in orders)
+    return len(orders)
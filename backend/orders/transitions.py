@@ -0,0 +1,102 @@
+"""Order status state machine and bulk transitions.
+
+``bulk_transition`` moves any number of orders to a new ``order_status``
+with one conditional UPDATE per chunk of ids (``... WHERE order_status IN
+(allowed sources)``) and records a ``TrackingEvent`` for every order that
+actually moved, all in one transaction. Orders whose current status does
+not allow the transition are left untouched and reported as skipped.
+
+Cancelling orders gives their reserved stock back and paying them
+(``purchased``) keeps it for good (see ``catalog.inventory``).
+"""
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from catalog.inventory import commit_orders, release_orders
+from tracking.models import TrackingEvent
+from .cache import invalidate_details
+from .models import Order
+
+Status = Order.OrderStatus
+
+ALLOWED_TRANSITIONS = {
+    Status.TO_PAY: {Status.PURCHASED, Status.CANCELLED},
+    Status.PURCHASED: {Status.WAREHOUSE, Status.REFUND, Status.CANCELLED},
+    Status.WAREHOUSE: {Status.WAY, Status.REFUND},
+    Status.WAY: {Status.RECEIVED},
+    Status.RECEIVED: {Status.COURIER},
+    Status.COURIER: {Status.COMPLETED},
+    Status.COMPLETED: {Status.REFUND},
+    Status.REFUND: set(),
+    Status.CANCELLED: set(),
+}
+
+UPDATE_CHUNK_SIZE = 1000
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+@dataclass
+class TransitionResult:
+    target: str
+    updated: list = field(default_factory=list)
+
+    @property
+    def count(self):
+        return len(self.updated)
+
+
+def allowed_sources(target):
+    return [source for source, targets in ALLOWED_TRANSITIONS.items() if target in targets]
+
+
+def can_transition(source, target):
+    return target in ALLOWED_TRANSITIONS.get(source, ())
+
+
+def bulk_transition(queryset, target, note="", **extra_updates):
+    """Move every order in ``queryset`` that may go to ``target``.
+
+    ``extra_updates`` are applied in the same UPDATE (e.g. ``payment_status``).
+    Returns a :class:`TransitionResult` listing the ``order_id`` of every
+    order that changed.
+    """
+    if target not in Status.values:
+        raise InvalidTransition(f"Unknown order status {target!r}.")
+    sources = allowed_sources(target)
+    result = TransitionResult(target=target)
+    if not sources:
+        return result
+
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(order_status__in=sources)
+            .select_for_update()
+            .values_list("id", "order_id")
+        )
+        now = timezone.now()
+        for start in range(0, len(rows), UPDATE_CHUNK_SIZE):
+            ids = [pk for pk, _order_id in rows[start:start + UPDATE_CHUNK_SIZE]]
+            Order.objects.filter(id__in=ids, order_status__in=sources).update(
+                order_status=target,
+                updated_at=now,
+                **extra_updates,
+            )
+        TrackingEvent.objects.bulk_create(
+            [TrackingEvent(order_id=pk, code=target, note=note) for pk, _order_id in rows],
+            batch_size=UPDATE_CHUNK_SIZE,
+        )
+        order_pks = [pk for pk, _order_id in rows]
+        if target == Status.CANCELLED:
+            release_orders(order_pks)
+        elif target == Status.PURCHASED:
+            commit_orders(order_pks)
+        # Queryset updates and bulk_create send no signals.
+        invalidate_details([order_id for _pk, order_id in rows])
+
+    result.updated = [order_id for _pk, order_id in rows]
+    return result
@@ -1,10 +1,26 @@
-from django.urls import path
+from django.urls import path, re_path
 
-from .views import EncryptedOrderCreateView, OrderCreateView, OrderDetailView, OrderListView
+from .async_views import AsyncOrderDetailView, AsyncOrderListView
+from .views import (
+    EncryptedOrderCreateView,
+    OrderBulkCreateView,
+    OrderBulkStatusView,
+    OrderCreateView,
+    OrderDetailView,
+    OrderExportView,
+    OrderListView,
+    OrderSearchView,
+)
 
 urlpatterns = [
     path("", OrderListView.as_view(), name="order-list"),
     path("<uuid:order_id>/", OrderDetailView.as_view(), name="order-detail"),
+    path("search/", OrderSearchView.as_view(), name="order-search"),
+    path("async/", AsyncOrderListView.as_view(), name="order-list-async"),
+    path("async/<uuid:order_id>/", AsyncOrderDetailView.as_view(), name="order-detail-async"),
+    re_path(r"^export/(?P<export_format>csv|ndjson)/$", OrderExportView.as_view(), name="order-export"),
     path("place/", OrderCreateView.as_view(), name="order-place"),
+    path("place/bulk/", OrderBulkCreateView.as_view(), name="order-place-bulk"),
     path("place/encrypted/", EncryptedOrderCreateView.as_view(), name="order-place-encrypted"),
+    path("status/bulk/", OrderBulkStatusView.as_view(), name="order-status-bulk"),
 ]
@@ -1,31 +1,145 @@
-import base64
-import json
-import os
-
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding
-from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ops.models import AuditLog
-from .models import Order
-from .serializers import OrderSerializer
+from accounts.permissions import IsOpsOrAdmin
+from exbuy_core.db_router import read_from_replica
+from exbuy_core.pagination import KeysetPagination
+from ops import audit
+from .cache import can_view, get_detail, set_detail
+from .crypto import InvalidPayload, KeyNotConfigured, decrypt_order_payload
+from .exports import CONTENT_TYPES, astream_export, stream_export
+from .filters import OrderFilter
+from .idempotency import run_idempotent
+from .models import ArchivedOrder, Order
+from .search import MIN_QUERY_LENGTH, search_orders
+from .serializers import (
+    OrderBulkCreateSerializer,
+    OrderSerializer,
+    OrderStatusTransitionSerializer,
+    OrderValuesSerializer,
+)
+from .transitions import bulk_transition
+
+
+class MerchantScopedOrderMixin:
+    """Restrict the order queryset to the requesting user's role."""
+
+    def get_queryset(self):
+        return Order.objects.visible_to(self.request.user).prefetch_related("items")
+
+
+@method_decorator(read_from_replica, name="get")
+class OrderListView(MerchantScopedOrderMixin, generics.ListAPIView):
+    serializer_class = OrderSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    filterset_class = OrderFilter
+
+    def list(self, request, *args, **kwargs):
+        # Same output as OrderSerializer, without per-instance serializer work.
+        serializer = OrderValuesSerializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(serializer.order_values(queryset))
+        return self.get_paginated_response(serializer.serialize(page))
+
+
+class OrderDetailView(MerchantScopedOrderMixin, generics.RetrieveAPIView):
+    """Order detail served from the detail cache (see ``orders.cache``).
 
+    Orders moved to the archive (see ``orders.archive``) are still found.
+
+    Reads stay on the primary: a cache entry filled from a lagging replica
+    would be stored as current.
+    """
 
-class OrderListView(generics.ListAPIView):
-    queryset = Order.objects.prefetch_related("items").order_by("-created_at")
     serializer_class = OrderSerializer
+    lookup_field = "order_id"
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return super().get_queryset().select_related("merchant")
+
+    def retrieve(self, request, *args, **kwargs):
+        entry, version = get_detail(kwargs["order_id"])
+        if entry is None:
+            try:
+                order = self.get_object()
+            except Http404:
+                order = get_object_or_404(
+                    ArchivedOrder.objects.visible_to(request.user).select_related("merchant"),
+                    order_id=kwargs["order_id"],
+                )
+            entry = set_detail(order, version)
+        elif not can_view(request.user, entry):
+            raise NotFound("No Order matches the given query.")
+
+        if request.headers.get("If-None-Match") == entry["etag"]:
+            response = HttpResponseNotModified()
+        else:
+            response = Response(entry["data"])
+        response["ETag"] = entry["etag"]
+        return response
+
+
+@method_decorator(read_from_replica, name="get")
+class OrderSearchView(MerchantScopedOrderMixin, generics.ListAPIView):
+    """Orders matching ``?q=`` (phone, AWB, order code, name, address), best match first.
+
+    Returns at most ``?limit=`` results (default 20, max 50) and accepts the
+    same filters as the order list.
+    """
 
-class OrderDetailView(generics.RetrieveAPIView):
-    queryset = Order.objects.prefetch_related("items")
     serializer_class = OrderSerializer
-    lookup_field = "order_id"
     permission_classes = [IsAuthenticated]
+    pagination_class = None
+    filterset_class = OrderFilter
+
+    def get_queryset(self):
+        query = self.request.query_params.get("q", "").strip()
+        if len(query) < MIN_QUERY_LENGTH:
+            raise ValidationError({"q": [f"Enter at least {MIN_QUERY_LENGTH} characters."]})
+        return search_orders(super().get_queryset(), query)
+
+    def filter_queryset(self, queryset):
+        try:
+            limit = min(int(self.request.query_params.get("limit", 20)), 50)
+        except ValueError:
+            limit = 20
+        return super().filter_queryset(queryset)[:max(limit, 1)]
+
+
+class OrderExportView(generics.GenericAPIView):
+    """Stream every visible order with its items as CSV or NDJSON.
+
+    Accepts the same filters as the order list.
+    """
+
+    permission_classes = [IsAuthenticated]
+    filterset_class = OrderFilter
+
+    def get_queryset(self):
+        return Order.objects.visible_to(self.request.user)
+
+    def get(self, request, export_format):
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(request._request, ASGIRequest):
+            content = astream_export(queryset, export_format)
+        else:
+            content = stream_export(queryset, export_format)
+
+        response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[export_format])
+        filename = f"orders-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["X-Accel-Buffering"] = "no"
+        return response
 
 
 class OrderCreateView(generics.CreateAPIView):
@@ -33,6 +147,9 @@ class OrderCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def create(self, request, *args, **kwargs):
+        return run_idempotent(request, lambda: self._create(request))
+
+    def _create(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
@@ -42,36 +159,67 @@ class OrderCreateView(generics.CreateAPIView):
         )
 
 
-class EncryptedOrderCreateView(APIView):
+class OrderBulkCreateView(APIView):
+    """Create a batch of orders with a constant number of INSERT statements."""
+
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        idempotency_key = request.headers.get("Idempotency-Key", "").strip()
-        if idempotency_key:
-            cached_response = cache.get(f"idempotency:orders:{idempotency_key}")
-            if cached_response:
-                return Response(cached_response, status=status.HTTP_200_OK)
-
-        payload_b64 = request.data.get("payload")
-        if not payload_b64:
-            return Response({"detail": "Missing payload."}, status=status.HTTP_400_BAD_REQUEST)
+        return run_idempotent(request, lambda: self._create(request), scope="orders:bulk")
 
-        private_key_pem = os.environ.get("ORDER_PAYLOAD_PRIVATE_KEY", "")
-        if not private_key_pem:
-            return Response({"detail": "Server key not configured."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    def _create(self, request):
+        serializer = OrderBulkCreateSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        created = serializer.save() if serializer.validated_data["valid_orders"] else []
+        errors = serializer.validated_data["errors"]  # create() adds orders that are out of stock
+        if not created:
+            return Response({"created": [], "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"created": created, "errors": errors}, status=status.HTTP_201_CREATED)
+
+
+class OrderBulkStatusView(APIView):
+    """Move many orders to a new status in one transaction."""
 
-        private_key = serialization.load_pem_private_key(
-            private_key_pem.encode("utf-8"),
-            password=None,
+    permission_classes = [IsOpsOrAdmin]
+
+    def post(self, request):
+        serializer = OrderStatusTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order_ids = set(serializer.validated_data["order_ids"])
+
+        result = bulk_transition(
+            Order.objects.visible_to(request.user).filter(order_id__in=order_ids),
+            serializer.validated_data["status"],
+            note=serializer.validated_data["note"],
+        )
+        updated = {str(order_id) for order_id in result.updated}
+        return Response(
+            {
+                "status": result.target,
+                "updated": sorted(updated),
+                "skipped": sorted(str(order_id) for order_id in order_ids if str(order_id) not in updated),
+            },
+            status=status.HTTP_200_OK,
         )
 
+
+class EncryptedOrderCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return run_idempotent(request, lambda: self._create(request))
+
+    def _create(self, request):
+        if not request.data.get("payload"):
+            return Response({"detail": "Missing payload."}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            decrypted = private_key.decrypt(
-                base64.b64decode(payload_b64),
-                padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None),
-            )
-            data = json.loads(decrypted.decode("utf-8"))
-        except (ValueError, json.JSONDecodeError) as exc:
+            data = decrypt_order_payload(request.data)
+        except KeyNotConfigured:
+            if request.data.get("kid"):
+                return Response({"detail": "Unknown key id."}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"detail": "Server key not configured."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except InvalidPayload as exc:
             return Response({"detail": "Invalid encrypted payload.", "error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
         serializer = OrderSerializer(data=data)
@@ -79,16 +227,11 @@ class EncryptedOrderCreateView(APIView):
         order = serializer.save()
 
         response_data = {"order_id": str(order.order_id), "order_code": order.order_code}
-        if idempotency_key:
-            cache.set(f"idempotency:orders:{idempotency_key}", response_data, 600)
-
-        AuditLog.objects.create(
-            action="order.create.encrypted",
-            resource=f"order:{order.order_id}",
-            request_id=getattr(request, "request_id", ""),
-            actor=request.user if request.user.is_authenticated else None,
-            ip_address=request.META.get("REMOTE_ADDR", ""),
-            user_agent=request.META.get("HTTP_USER_AGENT", ""),
+
+        audit.record(
+            "order.create.encrypted",
+            f"order:{order.order_id}",
+            request=request,
             metadata={"order_id": str(order.order_id)},
         )
 
@@ -9,4 +9,5 @@ export const config = {
   jwtIssuer: process.env.JWT_ISSUER || 'exbuy-api',
   rateLimitPerMinute: Number(process.env.RATE_LIMIT_PER_MINUTE || 60),
   orderPublicKey: process.env.ORDER_PAYLOAD_PUBLIC_KEY || '',
+  orderPayloadKeyId: process.env.ORDER_PAYLOAD_KEY_ID || 'default',
 };
@@ -1,5 +1,15 @@
 import crypto from 'crypto';
 
+export const ENVELOPE_ALGORITHM = 'RSA-OAEP-256+A256GCM';
+
+export interface EncryptedOrderEnvelope {
+  kid: string;
+  alg: typeof ENVELOPE_ALGORITHM;
+  ek: string;
+  iv: string;
+  payload: string;
+}
+
 export function encryptOrderPayload(payload: unknown, publicKeyPem: string): string {
   const plaintext = Buffer.from(JSON.stringify(payload));
   const encrypted = crypto.publicEncrypt(
@@ -12,3 +22,27 @@ export function encryptOrderPayload(payload: unknown, publicKeyPem: string): str
   );
   return encrypted.toString('base64');
 }
+
+// Hybrid envelope: RSA-OAEP wraps a fresh AES-256-GCM key, so the order JSON
+// is not limited by the RSA modulus size.
+export function encryptOrderEnvelope(payload: unknown, publicKeyPem: string, kid: string): EncryptedOrderEnvelope {
+  const contentKey = crypto.randomBytes(32);
+  const iv = crypto.randomBytes(12);
+  const cipher = crypto.createCipheriv('aes-256-gcm', contentKey, iv);
+  const ciphertext = Buffer.concat([cipher.update(JSON.stringify(payload)), cipher.final(), cipher.getAuthTag()]);
+  const wrappedKey = crypto.publicEncrypt(
+    {
+      key: publicKeyPem,
+      oaepHash: 'sha256',
+      padding: crypto.constants.RSA_PKCS1_OAEP_PADDING,
+    },
+    contentKey
+  );
+  return {
+    kid,
+    alg: ENVELOPE_ALGORITHM,
+    ek: wrappedKey.toString('base64'),
+    iv: iv.toString('base64'),
+    payload: ciphertext.toString('base64'),
+  };
+}
@@ -4,7 +4,7 @@ import { createHash } from 'crypto';
 import Redis from 'ioredis';
 
 import { config } from './config.js';
-import { encryptOrderPayload } from './crypto.js';
+import { encryptOrderEnvelope, type EncryptedOrderEnvelope } from './crypto.js';
 import { getIdempotency, setIdempotency } from './idempotency.js';
 import { logger } from './logger.js';
 import { orderQueue, orderWorker } from './queue.js';
@@ -52,13 +52,13 @@ app.post('/api/orders', async (req, res) => {
   }
 
   const { payload, order } = req.body as { payload?: string; order?: Record<string, unknown> };
-  let encryptedPayload = payload;
+  let encryptedPayload: string | EncryptedOrderEnvelope | undefined = payload;
   if (!encryptedPayload && order) {
     if (!config.orderPublicKey) {
       res.status(400).json({ error: 'ORDER_PAYLOAD_PUBLIC_KEY is required' });
       return;
     }
-    encryptedPayload = encryptOrderPayload(order, config.orderPublicKey);
+    encryptedPayload = encryptOrderEnvelope(order, config.orderPublicKey, config.orderPayloadKeyId);
   }
 
   if (!encryptedPayload) {